@@ -2,26 +2,47 @@
 Application configuration and settings
 """
 import os
+import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Literal, get_args
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # Base directory
 BASE_DIR = Path(__file__).parent.parent.parent
 
+# Generated caches, kept out of the source tree (ignored by git)
+CACHE_DIR = BASE_DIR / "cache"
+
 # Database configuration
 DATABASE_CONFIG = {
     "path": BASE_DIR / "fantasy_football.db",
     "pool_size": 10,
-    "timeout": 30
+    "timeout": 30,
+    # Built preload structures, reused on restart while the tables are unchanged
+    "preload_snapshot_path": CACHE_DIR / "preload_snapshot.pkl",
+    # DuckDB settings (SQL literals) applied while the ETL bulk-loads seasons
+    "bulk_load_settings": {
+        "checkpoint_threshold": "'1GB'",  # Checkpoint once after the load, not mid-load
+        "preserve_insertion_order": "false"
+    }
 }
 
-# API Configuration
-API_CONFIG = {
-    "rapidapi_key": "31cd7fd5cfmsh0039d0aaa4b3cf4p187526jsn4273673a1752",
-    "rapidapi_host": "tank01-nfl-live-in-game-real-time-statistics-nfl.p.rapidapi.com",
-    "request_timeout": 15,
-    "max_retries": 3
-}
+# API Configuration (secrets come from the environment or .env, never from source)
+class Settings(BaseSettings):
+    """External API settings loaded from environment variables"""
+    
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore", frozen=True)
+    
+    rapidapi_key: str = ""
+    rapidapi_host: str = "tank01-nfl-live-in-game-real-time-statistics-nfl.p.rapidapi.com"
+    request_timeout: int = 15
+    max_retries: int = 3
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the process-wide settings (read from the environment once)"""
+    return Settings()
 
 # DraftKings PPR Scoring System
 DRAFTKINGS_SCORING = {
@@ -38,7 +59,18 @@ DRAFTKINGS_SCORING = {
 }
 
 # Skill positions to track for fantasy football
-SKILL_POSITIONS = ['QB', 'RB', 'WR', 'TE']
+PositionLiteral = Literal['QB', 'RB', 'WR', 'TE']
+SKILL_POSITIONS = frozenset(get_args(PositionLiteral))
+
+# Season stats that top performer rankings can be ordered by
+StatTypeLiteral = Literal[
+    'fantasy_points', 'passing_yards', 'rushing_yards', 'receiving_yards',
+    'receiving_tds', 'rushing_tds', 'passing_tds', 'receptions'
+]
+TOP_PERFORMER_STATS = frozenset(get_args(StatTypeLiteral))
+
+# Number of ranked rows kept per (season, position, stat) at preload
+TOP_PERFORMER_DEPTH = 100
 
 # NFL Teams mapping
 NFL_TEAMS = {
@@ -75,19 +107,30 @@ NFL_TEAMS = {
     'TEN': 'Tennessee Titans',
     'WAS': 'Washington Commanders'
 }
+# Intern team codes so they are the same objects as the codes interned at preload
+NFL_TEAMS = {sys.intern(code): name for code, name in NFL_TEAMS.items()}
 
 # Cache configuration
 CACHE_CONFIG = {
     "default_ttl": 300,  # 5 minutes
     "player_stats_ttl": 600,  # 10 minutes
     "season_stats_ttl": 3600,  # 1 hour
-    "max_size": 1000
+    "data_status_ttl": 30,  # 30 seconds
+    "availability_ttl": 60,  # Which seasons are loaded
+    "http_max_age": 30,  # Browser cache lifetime for preloaded endpoints
+    "max_size": 1000,
+    "query_cache_size": 2048,  # Memoized preloaded lookups per lookup kind
+    "page_cache_size": 256,  # Encoded stats pages kept per endpoint
+    "db_result_ttl": 60,  # Metadata reads cached by DatabaseManager.execute_query(cache=True)
+    "db_result_cache_size": 128,
+    "shards": 16  # Independently locked partitions of the in-process cache
 }
 
 # ETL configuration
 ETL_CONFIG = {
     "batch_size": 1000,
     "max_workers": 3,
+    "max_concurrent_seasons": 3,  # Seasons fetched and loaded at the same time
     "retry_delay": 5,
     "seasons_to_load": [2023, 2024, 2025]
 }
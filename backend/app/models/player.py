@@ -1,9 +1,17 @@
 """
 Player data models and schemas
 """
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, BeforeValidator
+from typing import Optional, List, TypedDict, Annotated
 from datetime import datetime
+from app.config.settings import PositionLiteral
+
+def _upper(value):
+    """Uppercase string inputs before validation"""
+    return value.upper() if isinstance(value, str) else value
+
+# Route parameter type: accepts any case, rejects anything but a skill position
+Position = Annotated[PositionLiteral, BeforeValidator(_upper)]
 
 class PlayerBase(BaseModel):
     player_name: str
@@ -75,4 +83,54 @@ class DraftKingsResponse(BaseModel):
     data: Optional[dict] = None
     message: str
     timestamp: datetime
-    records_processed: Optional[int] = 0
\ No newline at end of file
+    records_processed: Optional[int] = 0
+
+# Plain-dict row shapes for the preloaded read path. These rows come straight
+# from the database and are serialized by orjson, so they skip per-row
+# Pydantic validation; the models above stay in use where input is validated.
+class PlayerStatsRow(TypedDict, total=False):
+    id: str
+    player_id: str
+    player_name: str
+    position: str
+    team: str
+    season: int
+    week: int
+    opponent: Optional[str]
+    passing_yards: float
+    passing_tds: int
+    interceptions: int
+    rushing_yards: float
+    rushing_tds: int
+    receptions: int
+    receiving_yards: float
+    receiving_tds: int
+    targets: int
+    fumbles_lost: int
+    fantasy_points: float
+    snap_percentage: Optional[float]
+    snap_count: Optional[int]
+    dk_salary: Optional[int]
+    created_at: datetime
+
+class SeasonStatsRow(TypedDict, total=False):
+    id: str
+    player_id: str
+    player_name: str
+    position: str
+    team: str
+    season: int
+    games_played: int
+    passing_yards: float
+    passing_tds: int
+    interceptions: int
+    rushing_yards: float
+    rushing_tds: int
+    receptions: int
+    receiving_yards: float
+    receiving_tds: int
+    targets: int
+    fumbles_lost: int
+    fantasy_points: float
+    created_at: datetime
+    updated_at: datetime
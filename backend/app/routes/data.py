@@ -1,23 +1,38 @@
 """
 Data management API routes
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException
+from typing import List, Optional, Dict, Any
+import asyncio
 import logging
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
 
 from app.services.etl_service import get_etl_service
-from app.utils.cache import get_cache
+from app.services.data_preloader import get_preloader
+from app.utils.cache import DATA_STATUS_TAG, get_cache
+from app.utils.clock import current_utc
 from app.models.player import RefreshResponse
+from app.config.settings import CACHE_CONFIG, ETL_CONFIG
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/data", tags=["data"])
 
+# ETL jobs run on a dedicated thread so pandas work and bulk writes never block
+# the event loop. A process pool is not an option: DuckDB lets only one process
+# open the database file, and the API process already holds it. One worker
+# also keeps writes to the database serialized.
+_etl_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="etl")
+
+# Running ETL jobs keyed by season set, so repeated requests attach instead of re-running
+_inflight: Dict[frozenset, asyncio.Future] = {}
+
 @router.post("/refresh", response_model=RefreshResponse)
 async def refresh_data(
-    background_tasks: BackgroundTasks,
     seasons: Optional[List[int]] = None,
-    include_current_extras: bool = True
+    include_current_extras: bool = True,
+    use_bulk: bool = True
 ):
     """
     Refresh NFL data for specified seasons
@@ -25,6 +40,7 @@ async def refresh_data(
     Args:
         seasons: List of seasons to refresh (defaults to [2023, 2024, 2025])
         include_current_extras: Include snap counts and DK pricing for current season
+        use_bulk: Replace each season's weekly stats inside a single transaction
     """
     try:
         if seasons is None:
@@ -40,21 +56,22 @@ async def refresh_data(
                 detail="No valid seasons specified. Must be between 2020 and current year + 1"
             )
         
-        etl_service = get_etl_service()
+        if _is_inflight(valid_seasons):
+            return RefreshResponse(
+                success=True,
+                message=f"Refresh already in progress for seasons: {valid_seasons}",
+                records_loaded=0,
+                timestamp=current_utc()
+            )
         
-        # Start background task for data loading
-        background_tasks.add_task(
-            _background_data_refresh,
-            etl_service,
-            valid_seasons,
-            include_current_extras
-        )
+        # Hand the load to the ETL thread and return immediately
+        _schedule_etl(valid_seasons, include_current_extras, "Background data refresh", use_bulk)
         
         return RefreshResponse(
             success=True,
             message=f"Data refresh started for seasons: {valid_seasons}",
             records_loaded=0,  # Will be updated by background task
-            timestamp=datetime.now(timezone.utc)
+            timestamp=current_utc()
         )
         
     except HTTPException:
@@ -63,29 +80,69 @@ async def refresh_data(
         logger.error(f"Error starting data refresh: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def _background_data_refresh(etl_service, seasons: List[int], include_current_extras: bool):
-    """Background task for data refresh"""
-    try:
-        logger.info(f"Starting background data refresh for seasons: {seasons}")
-        
-        result = await etl_service.load_season_data(
+def _run_etl(seasons: List[int], include_current_extras: bool, use_bulk: bool) -> Dict[str, Any]:
+    """Run the ETL for the given seasons to completion (on the ETL thread)"""
+    logger.info(f"Starting background data load for seasons: {seasons}")
+    
+    etl_service = get_etl_service()
+    
+    async def load():
+        # Size the downloads' default executor from config; asyncio.run shuts it
+        # down when the load finishes, so no threads idle between refreshes
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=ETL_CONFIG["max_workers"], thread_name_prefix="etl-fetch")
+        )
+        return await etl_service.load_season_data(
             seasons=seasons,
-            include_current_season_extras=include_current_extras
+            include_current_season_extras=include_current_extras,
+            use_bulk=use_bulk
         )
-        
-        logger.info(f"Background data refresh completed: {result}")
-        
-        # Clear cache after successful refresh
-        cache = get_cache()
-        cache.clear()
-        
-    except Exception as e:
-        logger.error(f"Background data refresh failed: {e}")
+    
+    return asyncio.run(load())
+
+def _is_inflight(seasons: List[int]) -> bool:
+    """Check whether an ETL run for exactly these seasons is queued or running"""
+    future = _inflight.get(frozenset(seasons))
+    return future is not None and not future.done()
+
+def _schedule_etl(seasons: List[int], include_current_extras: bool, label: str,
+                  use_bulk: bool = True) -> asyncio.Future:
+    """Submit an ETL run to the ETL thread and report back on the event loop"""
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_etl_pool, _run_etl, seasons, include_current_extras, use_bulk)
+    
+    key = frozenset(seasons)
+    _inflight[key] = future
+    future.add_done_callback(lambda _: _inflight.pop(key, None))
+    future.add_done_callback(partial(_on_etl_done, label))
+    return future
+
+def _on_etl_done(label: str, future: asyncio.Future):
+    """Log the ETL outcome and expire issued ETags after a load that may have written rows"""
+    if future.cancelled():
+        return
+    
+    error = future.exception()
+    if error is not None:
+        logger.error(f"{label} failed: {error}")
+        # Seasons load concurrently, so others may have committed before the failure
+        get_preloader().bump_generation()
+        return
+    
+    results = future.result()
+    logger.info(f"{label} completed: {results}")
+    
+    # Nothing written means nothing changed, so issued ETags stay valid
+    if not (results["total_weekly_records"] or results["total_season_records"]
+            or results["total_snap_records"]):
+        return
+    
+    # The ETL service already dropped cache entries for the reloaded seasons
+    get_preloader().bump_generation()
 
 @router.post("/load-season/{season}")
 async def load_season_data(
     season: int,
-    background_tasks: BackgroundTasks,
     include_extras: bool = True
 ):
     """Load data for a specific season"""
@@ -97,21 +154,18 @@ async def load_season_data(
                 detail=f"Invalid season. Must be between 2020 and {current_year + 1}"
             )
         
-        etl_service = get_etl_service()
-        
-        # Start background task
-        background_tasks.add_task(
-            _background_season_load,
-            etl_service,
-            season,
-            include_extras
-        )
+        if _is_inflight([season]):
+            message = f"Season {season} data loading already in progress"
+        else:
+            # Hand the load to the ETL thread and return immediately
+            _schedule_etl([season], include_extras, f"Background load for season {season}")
+            message = f"Season {season} data loading started"
         
         return {
             "success": True,
-            "message": f"Season {season} data loading started",
+            "message": message,
             "season": season,
-            "timestamp": datetime.now(timezone.utc)
+            "timestamp": current_utc()
         }
         
     except HTTPException:
@@ -120,80 +174,73 @@ async def load_season_data(
         logger.error(f"Error starting season load: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def _background_season_load(etl_service, season: int, include_extras: bool):
-    """Background task for single season load"""
-    try:
-        logger.info(f"Starting background load for season {season}")
-        
-        result = await etl_service.load_season_data(
-            seasons=[season],
-            include_current_season_extras=include_extras
-        )
-        
-        logger.info(f"Background season load completed: {result}")
-        
-        # Clear cache after successful load
-        cache = get_cache()
-        cache.clear()
-        
-    except Exception as e:
-        logger.error(f"Background season load failed: {e}")
-
 @router.get("/status")
 async def get_data_status():
     """Get current data status and statistics"""
     try:
-        from app.utils.database import get_db
-        
-        db = get_db()
-        
-        # Get data counts by season
-        season_stats = db.execute_query("""
-            SELECT season, COUNT(*) as weekly_records
-            FROM weekly_stats 
-            GROUP BY season 
-            ORDER BY season DESC
-        """)
-        
-        season_aggregates = db.execute_query("""
-            SELECT season, COUNT(*) as season_records
-            FROM season_stats 
-            GROUP BY season 
-            ORDER BY season DESC
-        """)
-        
-        # Get cache statistics
         cache = get_cache()
-        cache_stats = cache.stats()
-        
-        # Get latest update timestamps
-        latest_updates = db.execute_query("""
-            SELECT 
-                'weekly_stats' as table_name,
-                MAX(created_at) as last_updated
-            FROM weekly_stats
-            UNION ALL
-            SELECT 
-                'season_stats' as table_name,
-                MAX(created_at) as last_updated
-            FROM season_stats
-        """)
+        status = cache.get_or_set(
+            "data:status", _load_data_status, ttl=CACHE_CONFIG["data_status_ttl"], tags=(DATA_STATUS_TAG,)
+        )
         
         return {
             "success": True,
             "data": {
-                "season_stats": season_stats,
-                "season_aggregates": season_aggregates,
-                "cache_stats": cache_stats,
-                "latest_updates": latest_updates
+                **status,
+                "cache_stats": cache.stats()
             },
-            "timestamp": datetime.now(timezone.utc)
+            "timestamp": current_utc()
         }
         
     except Exception as e:
         logger.error(f"Error getting data status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _load_data_status() -> Dict[str, Any]:
+    """Load record counts and latest update times in a single round-trip"""
+    from app.utils.database import get_db
+    
+    db = get_db()
+    
+    # One query for all status rows; 'kind' tells the parts apart
+    rows = db.execute_query("""
+        SELECT 'weekly' AS kind, season, COUNT(*) AS record_count,
+               CAST(NULL AS TIMESTAMP) AS last_updated
+        FROM weekly_stats
+        GROUP BY season
+        UNION ALL
+        SELECT 'season_agg' AS kind, season, COUNT(*) AS record_count,
+               CAST(NULL AS TIMESTAMP) AS last_updated
+        FROM season_stats
+        GROUP BY season
+        UNION ALL
+        SELECT 'weekly_stats' AS kind, NULL AS season, NULL AS record_count,
+               MAX(created_at) AS last_updated
+        FROM weekly_stats
+        UNION ALL
+        SELECT 'season_stats' AS kind, NULL AS season, NULL AS record_count,
+               MAX(created_at) AS last_updated
+        FROM season_stats
+    """)
+    
+    season_stats = []
+    season_aggregates = []
+    latest_updates = []
+    
+    for row in sorted(rows, key=lambda r: r['season'] or 0, reverse=True):
+        if row['kind'] == 'weekly':
+            season_stats.append({"season": row['season'], "weekly_records": row['record_count']})
+        elif row['kind'] == 'season_agg':
+            season_aggregates.append({"season": row['season'], "season_records": row['record_count']})
+        else:
+            latest_updates.append({"table_name": row['kind'], "last_updated": row['last_updated']})
+    
+    return {
+        "season_stats": season_stats,
+        "season_aggregates": season_aggregates,
+        "latest_updates": latest_updates
+    }
+
 @router.delete("/cache")
 async def clear_cache():
     """Clear application cache"""
@@ -204,7 +251,7 @@ async def clear_cache():
         return {
             "success": True,
             "message": "Cache cleared successfully",
-            "timestamp": datetime.now(timezone.utc)
+            "timestamp": current_utc()
         }
         
     except Exception as e:
@@ -215,31 +262,35 @@ async def clear_cache():
 async def get_available_seasons():
     """Get list of available seasons in the database"""
     try:
-        from app.utils.database import get_db
-        
-        db = get_db()
-        
-        weekly_seasons = db.execute_query("""
-            SELECT DISTINCT season 
-            FROM weekly_stats 
-            ORDER BY season DESC
-        """)
-        
-        season_seasons = db.execute_query("""
-            SELECT DISTINCT season 
-            FROM season_stats 
-            ORDER BY season DESC
-        """)
+        cache = get_cache()
+        seasons = cache.get_or_set(
+            "data:seasons", _load_available_seasons, ttl=CACHE_CONFIG["availability_ttl"], tags=(DATA_STATUS_TAG,)
+        )
         
         return {
             "success": True,
-            "data": {
-                "weekly_data_seasons": [row['season'] for row in weekly_seasons],
-                "season_data_seasons": [row['season'] for row in season_seasons]
-            },
-            "timestamp": datetime.now(timezone.utc)
+            "data": seasons,
+            "timestamp": current_utc()
         }
         
     except Exception as e:
         logger.error(f"Error getting available seasons: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _load_available_seasons() -> Dict[str, List[int]]:
+    """Load the seasons present in both stats tables in a single round-trip"""
+    from app.utils.database import get_db
+    
+    db = get_db()
+    
+    rows = db.execute_query("""
+        SELECT 'w' AS kind, season FROM weekly_stats
+        UNION
+        SELECT 's' AS kind, season FROM season_stats
+        ORDER BY season DESC
+    """)
+    
+    return {
+        "weekly_data_seasons": [row['season'] for row in rows if row['kind'] == 'w'],
+        "season_data_seasons": [row['season'] for row in rows if row['kind'] == 's']
+    }
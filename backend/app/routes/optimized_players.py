@@ -2,26 +2,58 @@
 Ultra-optimized player routes with preloaded data for instant responses
 """
 import logging
+import zlib
 from typing import Optional, List
-from fastapi import APIRouter, Query, HTTPException
-from app.services.optimized_player_service import get_optimized_player_service
+from fastapi import APIRouter, Query, HTTPException, Depends, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
+from app.config.settings import CACHE_CONFIG, StatTypeLiteral
+from app.models.player import Position
+from app.services.optimized_player_service import (
+    ARROW_STREAM_MEDIA_TYPE, OptimizedPlayerService, get_optimized_player_service
+)
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/players", tags=["players"])
+def preloaded_etag(
+    request: Request,
+    response: Response,
+    player_service: OptimizedPlayerService = Depends(get_optimized_player_service)
+):
+    """
+    Tag responses with the preload generation and answer repeats with 304
+    
+    Preloaded data only changes on refresh, so a client that already holds
+    the response for this generation and query never needs the body again.
+    """
+    request_key = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+    etag = f'W/"{player_service.generation}-{zlib.crc32(request_key.encode()):08x}"'
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = f"public, max-age={CACHE_CONFIG['http_max_age']}"
 
-# Get the optimized service
-player_service = get_optimized_player_service()
+router = APIRouter(
+    prefix="/players",
+    tags=["players"],
+    default_response_class=ORJSONResponse,
+    dependencies=[Depends(preloaded_etag)]
+)
 
 @router.get("/weekly-stats")
 async def get_weekly_stats(
     season: Optional[int] = Query(None, description="NFL season"),
     week: Optional[int] = Query(None, description="Week number"),
-    position: Optional[str] = Query(None, description="Player position (QB, RB, WR, TE)"),
+    position: Optional[Position] = Query(None, description="Player position (QB, RB, WR, TE)"),
     team: Optional[str] = Query(None, description="Team abbreviation"),
     player_name: Optional[str] = Query(None, description="Player name (partial match)"),
     page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(100, ge=1, le=500, description="Records per page")
+    page_size: int = Query(100, ge=1, le=500, description="Records per page"),
+    response: Response = None,
+    player_service: OptimizedPlayerService = Depends(get_optimized_player_service)
 ):
     """
     Get weekly player statistics with instant access from preloaded data
@@ -29,6 +61,13 @@ async def get_weekly_stats(
     Ultra-fast endpoint that returns data in sub-millisecond time from memory
     """
     try:
+        # Pages are fixed until the next preload, so serve their encoded bytes
+        encoded = player_service.get_weekly_stats_json(season, week, position, team,
+                                                       player_name, page, page_size)
+        if encoded is not None:
+            return Response(content=encoded, media_type="application/json",
+                            headers=dict(response.headers))
+        
         result = player_service.get_weekly_stats(
             season=season,
             week=week,
@@ -45,14 +84,58 @@ async def get_weekly_stats(
         logger.error(f"Error getting weekly stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/weekly-stats/stream")
+async def stream_weekly_stats(
+    season: Optional[int] = Query(None, description="NFL season"),
+    week: Optional[int] = Query(None, description="Week number"),
+    position: Optional[Position] = Query(None, description="Player position (QB, RB, WR, TE)"),
+    team: Optional[str] = Query(None, description="Team abbreviation"),
+    player_name: Optional[str] = Query(None, description="Player name (partial match)"),
+    request: Request = None,
+    response: Response = None,
+    player_service: OptimizedPlayerService = Depends(get_optimized_player_service)
+):
+    """
+    Stream every matching weekly record as newline-delimited JSON
+    
+    For bulk consumers that want a whole season instead of paging through it.
+    Clients that accept application/vnd.apache.arrow.stream get an Arrow IPC
+    stream of record batches instead.
+    """
+    # The body depends on Accept, so caches must key on it too
+    response.headers["Vary"] = "Accept"
+    if ARROW_STREAM_MEDIA_TYPE in request.headers.get("accept", ""):
+        batches = player_service.iter_weekly_stats_arrow(
+            season=season,
+            week=week,
+            position=position,
+            team=team,
+            player_name=player_name
+        )
+        return StreamingResponse(batches, media_type=ARROW_STREAM_MEDIA_TYPE,
+                                 headers=dict(response.headers))
+    
+    rows = player_service.iter_weekly_stats(
+        season=season,
+        week=week,
+        position=position,
+        team=team,
+        player_name=player_name
+    )
+    lines = (orjson.dumps(row, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n" for row in rows)
+    
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers=dict(response.headers))
+
 @router.get("/season-stats")
 async def get_season_stats(
     season: Optional[int] = Query(None, description="NFL season"),
-    position: Optional[str] = Query(None, description="Player position (QB, RB, WR, TE)"),
+    position: Optional[Position] = Query(None, description="Player position (QB, RB, WR, TE)"),
     team: Optional[str] = Query(None, description="Team abbreviation"),
     player_name: Optional[str] = Query(None, description="Player name (partial match)"),
     page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(100, ge=1, le=500, description="Records per page")
+    page_size: int = Query(100, ge=1, le=500, description="Records per page"),
+    response: Response = None,
+    player_service: OptimizedPlayerService = Depends(get_optimized_player_service)
 ):
     """
     Get season-long player statistics with instant access from preloaded data
@@ -60,6 +143,12 @@ async def get_season_stats(
     Returns aggregated season stats for 250+ players with sub-millisecond response time
     """
     try:
+        encoded = player_service.get_season_stats_json(season, position, team,
+                                                       player_name, page, page_size)
+        if encoded is not None:
+            return Response(content=encoded, media_type="application/json",
+                            headers=dict(response.headers))
+        
         result = player_service.get_season_stats(
             season=season,
             position=position,
@@ -75,37 +164,48 @@ async def get_season_stats(
         logger.error(f"Error getting season stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _ranking_core(player_service: OptimizedPlayerService, response: Response, season: int,
+                  position: Optional[str], stat_type: str, limit: int, label: str):
+    """Shared body of the ranking endpoints (params already validated by FastAPI)"""
+    try:
+        # Rankings are fixed until the next preload, so serve their encoded bytes
+        encoded = player_service.get_top_performers_json(season, position, stat_type, limit)
+        if encoded is not None:
+            return Response(content=encoded, media_type="application/json",
+                            headers=dict(response.headers))
+        
+        return player_service.get_top_performers(
+            season=season,
+            position=position,
+            stat_type=stat_type,
+            limit=limit
+        )
+    except Exception as e:
+        logger.error(f"Error getting {label}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/top-performers")
 async def get_top_performers(
     season: int = Query(..., description="NFL season"),
-    position: Optional[str] = Query(None, description="Player position filter"),
-    stat_type: str = Query("fantasy_points", description="Stat to rank by"),
-    limit: int = Query(20, ge=1, le=100, description="Number of top performers")
+    position: Optional[Position] = Query(None, description="Player position filter"),
+    stat_type: StatTypeLiteral = Query("fantasy_points", description="Stat to rank by"),
+    limit: int = Query(20, ge=1, le=100, description="Number of top performers"),
+    response: Response = None,
+    player_service: OptimizedPlayerService = Depends(get_optimized_player_service)
 ):
     """
     Get top performers by specified statistic with instant access
     
     Lightning-fast rankings from preloaded data
     """
-    try:
-        result = player_service.get_top_performers(
-            season=season,
-            position=position,
-            stat_type=stat_type,
-            limit=limit
-        )
-        
-        return result
-        
-    except Exception as e:
-        logger.error(f"Error getting top performers: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return _ranking_core(player_service, response, season, position, stat_type, limit, "top performers")
 
 @router.get("/search")
 async def search_players(
     q: str = Query(..., min_length=2, description="Search query"),
     season: Optional[int] = Query(None, description="Filter by season"),
-    limit: int = Query(20, ge=1, le=100, description="Maximum results")
+    limit: int = Query(20, ge=1, le=100, description="Maximum results"),
+    player_service: OptimizedPlayerService = Depends(get_optimized_player_service)
 ):
     """
     Search players by name with instant results from preloaded data
@@ -129,7 +229,8 @@ async def search_players(
 async def get_trend_data(
     player_names: List[str] = Query(..., description="List of player names"),
     season: int = Query(..., description="NFL season"),
-    weeks: Optional[List[int]] = Query(None, description="Specific weeks to include")
+    weeks: Optional[List[int]] = Query(None, description="Specific weeks to include"),
+    player_service: OptimizedPlayerService = Depends(get_optimized_player_service)
 ):
     """
     Get trend data for specific players across weeks
@@ -151,42 +252,26 @@ async def get_trend_data(
 
 @router.get("/positions/{position}/leaders")
 async def get_position_leaders(
-    position: str,
+    position: Position,
     season: int = Query(..., description="NFL season"),
-    stat_type: str = Query("fantasy_points", description="Stat to rank by"),
-    limit: int = Query(50, ge=1, le=100, description="Number of leaders")
+    stat_type: StatTypeLiteral = Query("fantasy_points", description="Stat to rank by"),
+    limit: int = Query(50, ge=1, le=100, description="Number of leaders"),
+    response: Response = None,
+    player_service: OptimizedPlayerService = Depends(get_optimized_player_service)
 ):
     """
     Get leaders for a specific position with instant access
     
     Position-specific rankings from preloaded data
     """
-    try:
-        # Validate position
-        valid_positions = ['QB', 'RB', 'WR', 'TE']
-        if position.upper() not in valid_positions:
-            raise HTTPException(status_code=400, detail=f"Invalid position. Must be one of: {valid_positions}")
-        
-        result = player_service.get_top_performers(
-            season=season,
-            position=position.upper(),
-            stat_type=stat_type,
-            limit=limit
-        )
-        
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error getting position leaders: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return _ranking_core(player_service, response, season, position, stat_type, limit, "position leaders")
 
 @router.get("/compare")
 async def compare_players(
     player_names: List[str] = Query(..., description="List of player names to compare"),
     season: int = Query(..., description="NFL season"),
-    stat_types: Optional[List[str]] = Query(None, description="Specific stats to compare")
+    stat_types: Optional[List[str]] = Query(None, description="Specific stats to compare"),
+    player_service: OptimizedPlayerService = Depends(get_optimized_player_service)
 ):
     """
     Compare multiple players side by side with instant data access
@@ -200,32 +285,28 @@ async def compare_players(
         if len(player_names) > 10:
             raise HTTPException(status_code=400, detail="Maximum 10 players allowed for comparison")
         
-        # Get season stats for all players
+        # Get season stats for all players in one batched lookup
+        rows = player_service.get_season_stats_bulk(season, player_names)
         comparison_data = []
         
         for player_name in player_names:
-            player_result = player_service.get_season_stats(
-                season=season,
-                player_name=player_name,
-                page_size=1
-            )
+            player_data = rows.get(player_name.lower())
+            if player_data is None:
+                continue
             
-            if player_result["success"] and player_result["data"]:
-                player_data = player_result["data"][0]
-                
-                # Filter to requested stats if specified
-                if stat_types:
-                    filtered_data = {
-                        "player_name": player_data["player_name"],
-                        "position": player_data["position"],
-                        "team": player_data["team"]
-                    }
-                    for stat in stat_types:
-                        if stat in player_data:
-                            filtered_data[stat] = player_data[stat]
-                    comparison_data.append(filtered_data)
-                else:
-                    comparison_data.append(player_data)
+            # Filter to requested stats if specified
+            if stat_types:
+                filtered_data = {
+                    "player_name": player_data["player_name"],
+                    "position": player_data["position"],
+                    "team": player_data["team"]
+                }
+                for stat in stat_types:
+                    if stat in player_data:
+                        filtered_data[stat] = player_data[stat]
+                comparison_data.append(filtered_data)
+            else:
+                comparison_data.append(player_data)
         
         return {
             "success": True,
@@ -243,7 +324,8 @@ async def compare_players(
 
 @router.get("/stats-summary")
 async def get_stats_summary(
-    season: int = Query(..., description="NFL season")
+    season: int = Query(..., description="NFL season"),
+    player_service: OptimizedPlayerService = Depends(get_optimized_player_service)
 ):
     """
     Get comprehensive statistics summary with instant access
@@ -251,45 +333,7 @@ async def get_stats_summary(
     Overview of all player data from preloaded memory
     """
     try:
-        # Get data for all positions
-        summary = {}
-        
-        for position in ['QB', 'RB', 'WR', 'TE']:
-            position_data = player_service.get_season_stats(
-                season=season,
-                position=position,
-                page_size=1000  # Get all players for this position
-            )
-            
-            if position_data["success"]:
-                players = position_data["data"]
-                
-                if players:
-                    # Calculate summary stats
-                    total_players = len(players)
-                    total_fantasy_points = sum(p.get("fantasy_points", 0) for p in players)
-                    avg_fantasy_points = total_fantasy_points / total_players if total_players > 0 else 0
-                    
-                    # Get top performer
-                    top_performer = max(players, key=lambda p: p.get("fantasy_points", 0))
-                    
-                    summary[position] = {
-                        "total_players": total_players,
-                        "total_fantasy_points": round(total_fantasy_points, 1),
-                        "avg_fantasy_points": round(avg_fantasy_points, 1),
-                        "top_performer": {
-                            "name": top_performer["player_name"],
-                            "team": top_performer["team"],
-                            "fantasy_points": top_performer.get("fantasy_points", 0)
-                        }
-                    }
-        
-        return {
-            "success": True,
-            "season": season,
-            "summary": summary,
-            "total_players": sum(pos_data["total_players"] for pos_data in summary.values())
-        }
+        return player_service.get_stats_summary(season)
         
     except Exception as e:
         logger.error(f"Error getting stats summary: {e}")
@@ -6,7 +6,8 @@ from typing import Optional, List
 import logging
 
 from app.services.player_service import get_player_service
-from app.models.player import PlayerStatsResponse
+from app.config.settings import StatTypeLiteral
+from app.models.player import PlayerStatsResponse, Position
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/players", tags=["players"])
@@ -15,7 +16,7 @@ router = APIRouter(prefix="/players", tags=["players"])
 async def get_weekly_stats(
     season: int = Query(..., description="NFL season"),
     week: Optional[int] = Query(None, description="Specific week"),
-    position: Optional[str] = Query(None, description="Player position (QB, RB, WR, TE)"),
+    position: Optional[Position] = Query(None, description="Player position (QB, RB, WR, TE)"),
     team: Optional[str] = Query(None, description="Team abbreviation"),
     player_name: Optional[str] = Query(None, description="Player name search"),
     page: int = Query(1, ge=1, description="Page number"),
@@ -46,7 +47,7 @@ async def get_weekly_stats(
 @router.get("/season-stats")
 async def get_season_stats(
     season: int = Query(..., description="NFL season"),
-    position: Optional[str] = Query(None, description="Player position (QB, RB, WR, TE)"),
+    position: Optional[Position] = Query(None, description="Player position (QB, RB, WR, TE)"),
     team: Optional[str] = Query(None, description="Team abbreviation"),
     player_name: Optional[str] = Query(None, description="Player name search"),
     page: int = Query(1, ge=1, description="Page number"),
@@ -105,8 +106,8 @@ async def get_trend_data(
 @router.get("/top-performers")
 async def get_top_performers(
     season: int = Query(..., description="NFL season"),
-    position: Optional[str] = Query(None, description="Player position (QB, RB, WR, TE)"),
-    stat_type: str = Query("fantasy_points", description="Stat to rank by"),
+    position: Optional[Position] = Query(None, description="Player position (QB, RB, WR, TE)"),
+    stat_type: StatTypeLiteral = Query("fantasy_points", description="Stat to rank by"),
     limit: int = Query(20, ge=1, le=100, description="Number of top performers"),
     week: Optional[int] = Query(None, description="Specific week (otherwise season stats)")
 ):
@@ -4,370 +4,883 @@ Preloads all frequently accessed data into memory on startup
 """
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+import mmap
+import pickle
+import struct
+import sys
+import time
+from collections import defaultdict
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, List, Any, Optional, Callable
+from pathlib import Path
 import json
+import numpy as np
+import pandas as pd
+from app.config.settings import CACHE_CONFIG, DATABASE_CONFIG, TOP_PERFORMER_STATS, TOP_PERFORMER_DEPTH
+from app.models.player import PlayerStatsRow, SeasonStatsRow
 from app.utils.database import DatabaseManager
 from app.utils.cache import get_cache
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the layout of preloaded_data changes, to discard old snapshots
+SNAPSHOT_VERSION = 8
+
+# Out-of-band array buffers in the snapshot are aligned for NumPy
+SNAPSHOT_ALIGNMENT = 64
+
+# Preloaded rows carry exactly the fields of their row types, whatever else
+# gets added to the tables
+WEEKLY_COLUMNS = ", ".join(PlayerStatsRow.__annotations__)
+SEASON_COLUMNS = ", ".join(SeasonStatsRow.__annotations__)
+
+# Low-cardinality string columns repeated across thousands of preloaded rows
+CATEGORICAL_FIELDS = ('team', 'position', 'opponent')
+
+# Length of the n-grams in the player search index
+SEARCH_GRAM_SIZE = 3
+
 class DataPreloader:
     def __init__(self):
         self.db = DatabaseManager()
         self.cache = get_cache()
         self.preloaded_data = {}
         self.is_loaded = False
+        # Bumped whenever the data behind the preloaded endpoints may have changed
+        self.generation = 0
+        self.total_records = 0
+        
+        # Memoized lookups over preloaded_data, reset whenever it is rebuilt
+        self._query_caches = []
+        self._season_rows_cache = self._memoized(self._select_season_rows)
+        self._weekly_rows_cache = self._memoized(self._select_weekly_rows)
+        self._search_cache = self._memoized(self._search_players)
+        
+    def _memoized(self, func: Callable) -> Callable:
+        """Wrap a lookup in an LRU cache keyed on its arguments
+        
+        Results are shared between callers, so arrays are made read-only and
+        lists are stored as tuples.
+        """
+        @lru_cache(maxsize=CACHE_CONFIG["query_cache_size"])
+        def cached_lookup(*args):
+            result = func(*args)
+            if isinstance(result, np.ndarray):
+                result.setflags(write=False)
+            elif isinstance(result, list):
+                result = tuple(result)
+            return result
+        
+        self._query_caches.append(cached_lookup)
+        return cached_lookup
+    
+    def _clear_query_caches(self):
+        """Drop memoized lookups computed from the previous preloaded_data"""
+        for query_cache in self._query_caches:
+            query_cache.cache_clear()
         
     async def preload_all_data(self):
         """Preload all frequently accessed data into memory"""
         logger.info("Starting comprehensive data preloading...")
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         try:
-            # Preload in parallel for maximum speed
-            await asyncio.gather(
-                self._preload_season_stats(),
-                self._preload_weekly_stats(),
-                self._preload_player_lookups(),
-                self._preload_aggregated_views(),
-                self._preload_top_performers(),
-                return_exceptions=True
-            )
+            fingerprint = await self._data_fingerprint()
+            
+            if await asyncio.to_thread(self._load_snapshot, fingerprint):
+                logger.info("Restored preloaded data from snapshot")
+            else:
+                # Preload in parallel for maximum speed: queries run on their own
+                # cursors and index building runs on worker threads
+                results = await asyncio.gather(
+                    self._preload_season_views(),
+                    self._preload_weekly_stats(),
+                    return_exceptions=True
+                )
+                failed = [result for result in results if isinstance(result, Exception)]
+                for result in failed:
+                    logger.error(f"Preload phase failed: {result}")
+                if not failed:
+                    await asyncio.to_thread(self._save_snapshot, fingerprint)
             
+            # Counted once per load so get_stats never walks the datasets
+            self.total_records = sum(len(data) if isinstance(data, list) else 1 
+                                     for data in self.preloaded_data.values())
+            self._clear_query_caches()
             self.is_loaded = True
-            duration = (datetime.now() - start_time).total_seconds()
+            self.generation += 1
+            duration = time.perf_counter() - start_time
             logger.info(f"Data preloading completed in {duration:.2f} seconds")
-            
-            # Log preload statistics
-            total_records = sum(len(data) if isinstance(data, list) else 1 
-                              for data in self.preloaded_data.values())
-            logger.info(f"Preloaded {total_records} records across {len(self.preloaded_data)} datasets")
+            logger.info(f"Preloaded {self.total_records} records across {len(self.preloaded_data)} datasets")
             
         except Exception as e:
             logger.error(f"Error during data preloading: {e}")
             self.is_loaded = False
             
+    async def _data_fingerprint(self) -> tuple:
+        """Summarize the source tables so a snapshot can be checked for staleness"""
+        rows = await self.db.execute_query_async("""
+        SELECT
+            (SELECT COUNT(*) FROM weekly_stats) AS weekly_count,
+            (SELECT MAX(created_at) FROM weekly_stats) AS weekly_updated,
+            (SELECT COUNT(*) FROM season_stats) AS season_count,
+            (SELECT MAX(updated_at) FROM season_stats) AS season_updated
+        """)
+        return (SNAPSHOT_VERSION,) + tuple(str(value) for value in rows[0].values())
+    
+    def _load_snapshot(self, fingerprint: tuple) -> bool:
+        """Restore preloaded_data from the snapshot file if it matches the tables
+        
+        Array buffers are memory-mapped read-only rather than copied, so every
+        worker process restoring the same snapshot shares their pages.
+        """
+        path = Path(DATABASE_CONFIG["preload_snapshot_path"])
+        if not path.exists():
+            return False
+        
+        try:
+            with path.open("rb") as snapshot_file:
+                mapped = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            meta_offset, = struct.unpack("<Q", mapped[-8:])
+            snapshot = pickle.loads(mapped[meta_offset:-8])
+            
+            if snapshot.get("fingerprint") != fingerprint:
+                logger.info("Preload snapshot is stale, rebuilding")
+                return False
+            
+            view = memoryview(mapped)
+            buffers = [view[offset:offset + size] for offset, size in snapshot["buffers"]]
+            self.preloaded_data = pickle.loads(snapshot["data"], buffers=buffers)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable preload snapshot: {e}")
+            return False
+        
+        return True
+    
+    def _save_snapshot(self, fingerprint: tuple):
+        """Write preloaded_data to the snapshot file for the next startup
+        
+        Layout: aligned array buffers, then a pickled header holding the
+        fingerprint, buffer offsets and the pickled data, then the header offset.
+        """
+        path = Path(DATABASE_CONFIG["preload_snapshot_path"])
+        temp_path = path.with_suffix(".tmp")
+        
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            buffers = []
+            data = pickle.dumps(self.preloaded_data, protocol=5, buffer_callback=buffers.append)
+            
+            layout = []
+            with temp_path.open("wb") as snapshot_file:
+                for buffer in buffers:
+                    raw = buffer.raw()
+                    snapshot_file.write(b"\0" * (-snapshot_file.tell() % SNAPSHOT_ALIGNMENT))
+                    layout.append((snapshot_file.tell(), raw.nbytes))
+                    snapshot_file.write(raw)
+                
+                meta_offset = snapshot_file.tell()
+                pickle.dump({"fingerprint": fingerprint, "buffers": layout, "data": data},
+                            snapshot_file, protocol=5)
+                snapshot_file.write(struct.pack("<Q", meta_offset))
+            # Replace atomically so a crash never leaves a truncated snapshot
+            temp_path.replace(path)
+            logger.info(f"Saved preload snapshot to {path}")
+        except Exception as e:
+            logger.warning(f"Could not save preload snapshot: {e}")
+        
+    async def _preload_season_views(self):
+        """Preload season statistics, then the views derived from them"""
+        await self._preload_season_stats()
+        await asyncio.gather(
+            asyncio.to_thread(self._build_aggregated_views),
+            asyncio.to_thread(self._build_top_performers),
+            self._preload_player_lookups()
+        )
+        
     async def _preload_season_stats(self):
         """Preload all season statistics"""
         logger.info("Preloading season statistics...")
         
         # Load all season stats
-        query = """
-        SELECT * FROM season_stats 
+        query = f"""
+        SELECT {SEASON_COLUMNS} FROM season_stats 
         ORDER BY season DESC, fantasy_points DESC
         """
         
-        season_data = self.db.execute_query(query)
+        season_data = await self.db.execute_query_async(query)
+        await asyncio.to_thread(self._index_season_stats, season_data)
         
-        # Organize by season and position for fast access
-        self.preloaded_data['season_stats_all'] = season_data
+        logger.info(f"Preloaded {len(season_data)} season records")
         
-        # Create indexed views for instant filtering
-        by_season = {}
-        by_position = {}
-        by_season_position = {}
+    def _index_season_stats(self, season_data: List[Dict]):
+        """Build the season row store and its indexes (on a worker thread)"""
+        self._intern_categoricals(season_data)
         
+        # season_stats_all is the one canonical row store; every index below
+        # holds int32 row ids into it (ascending, so preserving its order)
+        self.preloaded_data['season_stats_all'] = season_data
+        self.preloaded_data['season_table'] = self._build_season_table(season_data)
+        
+        self.preloaded_data['season_index'] = self._contiguous_row_ids(season_data, 'season')
+        self.preloaded_data['season_position_index'] = self._group_row_ids(
+            season_data, lambda record: (record['season'], record['position']))
+        self.preloaded_data['position_index'] = self._group_row_ids(
+            season_data, lambda record: record['position'])
+        self.preloaded_data['season_team_index'] = self._group_row_ids(
+            season_data, lambda record: (record['season'], record['team']))
+        
+        # By season + lowercased name (rows arrive best-first, keep the first)
+        by_season_name = {}
         for record in season_data:
-            season = record['season']
-            position = record['position']
-            
-            # By season
-            if season not in by_season:
-                by_season[season] = []
-            by_season[season].append(record)
-            
-            # By position
-            if position not in by_position:
-                by_position[position] = []
-            by_position[position].append(record)
-            
-            # By season + position
-            key = f"{season}_{position}"
-            if key not in by_season_position:
-                by_season_position[key] = []
-            by_season_position[key].append(record)
+            by_season_name.setdefault((record['season'], record['player_name'].lower()), record)
+        self.preloaded_data['season_by_season_name'] = by_season_name
+        
+    @staticmethod
+    def _build_season_table(records: List[Dict]) -> Dict[str, np.ndarray]:
+        """Build struct-of-arrays columns over season_stats_all"""
+        table = {
+            "season": np.fromiter((r['season'] for r in records), dtype=np.int16, count=len(records)),
+            "player_name": DataPreloader._encode_categorical(records, 'player_name'),
+            "position": DataPreloader._encode_categorical(records, 'position'),
+            "team": DataPreloader._encode_categorical(records, 'team')
+        }
+        for stat_type in TOP_PERFORMER_STATS:
+            table[stat_type] = DataPreloader._narrow_stat(np.fromiter(
+                (r.get(stat_type) or 0 for r in records), dtype=np.float64, count=len(records)
+            ))
+        # Lowercased once per distinct name for the substring filter
+        names = table['player_name']
+        names['values_lower'] = np.array([name.lower() for name in names['values']], dtype=str)
+        return table
+    
+    @staticmethod
+    def _narrow_stat(values: np.ndarray) -> np.ndarray:
+        """Store a whole-number stat column in the narrowest signed integer type
         
-        self.preloaded_data['season_by_season'] = by_season
-        self.preloaded_data['season_by_position'] = by_position
-        self.preloaded_data['season_by_season_position'] = by_season_position
+        Yardage, touchdown and reception totals fit int16, a quarter of the
+        float64 they are read as; fractional columns such as fantasy points
+        are returned unchanged.
+        """
+        if not len(values) or not np.array_equal(values, np.round(values)):
+            return values
+        for dtype in (np.int16, np.int32):
+            info = np.iinfo(dtype)
+            # Keep clear of the minimum so negating for descending order cannot overflow
+            if info.min < values.min() and values.max() <= info.max:
+                return values.astype(dtype)
+        return values
+    
+    @staticmethod
+    def _group_row_ids(records: List[Dict], key_func: Callable[[Dict], Any]) -> Dict[Any, np.ndarray]:
+        """Bucket row ids by key, keeping each bucket in row order"""
+        groups = defaultdict(list)
+        DataPreloader._bucket_row_ids(groups, records, key_func)
+        return DataPreloader._freeze_row_ids(groups)
+    
+    @staticmethod
+    def _bucket_row_ids(groups: Dict[Any, List[int]], records: List[Dict],
+                        key_func: Callable[[Dict], Any], start: int = 0):
+        """Append the ids of records, numbered from start, to their key's bucket"""
+        for row_id, record in enumerate(records, start):
+            groups[key_func(record)].append(row_id)
+    
+    @staticmethod
+    def _freeze_row_ids(groups: Dict[Any, List[int]]) -> Dict[Any, np.ndarray]:
+        """Convert row id buckets to int32 arrays"""
+        return {key: np.array(row_ids, dtype=np.int32) for key, row_ids in groups.items()}
+    
+    @staticmethod
+    def _contiguous_row_ids(records: List[Dict], field: str) -> Dict[Any, np.ndarray]:
+        """Bucket row ids by a field the rows are already sorted on"""
+        groups = {}
+        start = 0
+        for key, group in groupby(records, key=itemgetter(field)):
+            stop = start + sum(1 for _ in group)
+            groups[key] = np.arange(start, stop, dtype=np.int32)
+            start = stop
+        return groups
+    
+    @staticmethod
+    def _build_weekly_columns(records: List[Dict]) -> Dict[str, Any]:
+        """Build struct-of-arrays columns for the weekly filters"""
+        count = len(records)
+        columns = {
+            "season": np.fromiter((r['season'] for r in records), dtype=np.int16, count=count),
+            "week": np.fromiter((r['week'] for r in records), dtype=np.int8, count=count)
+        }
         
-        logger.info(f"Preloaded {len(season_data)} season records")
+        for field in ('position', 'team', 'player_name'):
+            columns[field] = DataPreloader._encode_categorical(records, field)
+        
+        return columns
+    
+    @staticmethod
+    def _encode_categorical(records: List[Dict], field: str) -> Dict[str, Any]:
+        """Encode a string column as the narrowest integer codes plus lookups
+        
+        Returns codes (one per row), categories (value -> code) and values
+        (code -> value), so filters compare small integers instead of strings.
+        """
+        categories = {}
+        codes = np.fromiter(
+            (categories.setdefault(r[field], len(categories)) for r in records),
+            dtype=np.int32, count=len(records)
+        )
+        return {
+            "codes": codes.astype(np.min_scalar_type(max(len(categories) - 1, 0))),
+            "categories": categories,
+            "values": np.array(list(categories), dtype=object)
+        }
+    
+    @staticmethod
+    def _intern_categoricals(records: List[Dict]) -> List[Dict]:
+        """Share one string object per team code and position across all records"""
+        for record in records:
+            for field in CATEGORICAL_FIELDS:
+                value = record.get(field)
+                if isinstance(value, str):
+                    record[field] = sys.intern(value)
+        return records
+    
+    @staticmethod
+    def build_summary_columns(records: List[SeasonStatsRow]) -> Dict[str, np.ndarray]:
+        """Build name/team/fantasy point columns for a group of season rows"""
+        return {
+            "names": np.array([r['player_name'] for r in records], dtype=object),
+            "teams": np.array([r['team'] for r in records], dtype=object),
+            "fantasy_points": np.array([r['fantasy_points'] or 0 for r in records], dtype=np.float64)
+        }
         
     async def _preload_weekly_stats(self):
         """Preload weekly statistics with smart indexing"""
         logger.info("Preloading weekly statistics...")
         
-        query = """
-        SELECT * FROM weekly_stats 
+        query = f"""
+        SELECT {WEEKLY_COLUMNS} FROM weekly_stats 
         ORDER BY season DESC, week DESC, fantasy_points DESC
         """
         
-        weekly_data = self.db.execute_query(query)
+        count = await asyncio.to_thread(self._index_weekly_stats, query)
+        
+        logger.info(f"Preloaded {count} weekly records")
+        
+    def _index_weekly_stats(self, query: str) -> int:
+        """Stream weekly rows off the cursor and build the row store and its columns (on a worker thread)"""
+        weekly_data = []
+        by_season_position = defaultdict(list)
+        by_season_week_position = defaultdict(list)
+        by_season_week = defaultdict(list)
+        by_season_team = defaultdict(list)
+        
+        # Bucket each chunk as it arrives instead of after the full result is materialized
+        for chunk in self.db.iter_query(query):
+            self._intern_categoricals(chunk)
+            start = len(weekly_data)
+            self._bucket_row_ids(by_season_position, chunk,
+                                 lambda record: (record['season'], record['position']), start)
+            self._bucket_row_ids(by_season_week_position, chunk,
+                                 lambda record: (record['season'], record['week'], record['position']), start)
+            self._bucket_row_ids(by_season_week, chunk,
+                                 lambda record: (record['season'], record['week']), start)
+            self._bucket_row_ids(by_season_team, chunk,
+                                 lambda record: (record['season'], record['team']), start)
+            weekly_data.extend(chunk)
         
-        # Create multiple indexed views
         self.preloaded_data['weekly_stats_all'] = weekly_data
         
-        by_season = {}
-        by_position = {}
-        by_player = {}
-        by_season_week = {}
+        # Column arrays over weekly_stats_all; filters become boolean masks
+        self.preloaded_data['weekly_columns'] = self._build_weekly_columns(weekly_data)
+        # Rows are sorted by season, so each season is one contiguous row-id range
+        self.preloaded_data['weekly_season_index'] = self._contiguous_row_ids(weekly_data, 'season')
+        # Hot filter combinations resolve with a single dict hit
+        self.preloaded_data['weekly_season_position_index'] = self._freeze_row_ids(by_season_position)
+        self.preloaded_data['weekly_season_week_position_index'] = self._freeze_row_ids(by_season_week_position)
+        # Team and week posting lists are intersected with the others as needed
+        self.preloaded_data['weekly_season_week_index'] = self._freeze_row_ids(by_season_week)
+        self.preloaded_data['weekly_season_team_index'] = self._freeze_row_ids(by_season_team)
+        self.preloaded_data['weekly_seasons'] = sorted(self.preloaded_data['weekly_season_index'], reverse=True)
         
-        for record in weekly_data:
-            season = record['season']
-            week = record['week']
-            position = record['position']
-            player_name = record['player_name']
-            
-            # By season
-            if season not in by_season:
-                by_season[season] = []
-            by_season[season].append(record)
-            
-            # By position
-            if position not in by_position:
-                by_position[position] = []
-            by_position[position].append(record)
-            
-            # By player
-            if player_name not in by_player:
-                by_player[player_name] = []
-            by_player[player_name].append(record)
-            
-            # By season + week
-            key = f"{season}_{week}"
-            if key not in by_season_week:
-                by_season_week[key] = []
-            by_season_week[key].append(record)
-        
-        self.preloaded_data['weekly_by_season'] = by_season
-        self.preloaded_data['weekly_by_position'] = by_position
-        self.preloaded_data['weekly_by_player'] = by_player
-        self.preloaded_data['weekly_by_season_week'] = by_season_week
-        
-        logger.info(f"Preloaded {len(weekly_data)} weekly records")
+        return len(weekly_data)
         
     async def _preload_player_lookups(self):
         """Preload player lookup tables for instant search"""
         logger.info("Preloading player lookups...")
         
-        # Get unique players
-        query = """
-        SELECT DISTINCT player_name, position, team, season
-        FROM season_stats
-        ORDER BY player_name
-        """
+        # Derived from the already loaded season rows instead of re-scanning season_stats
+        players = await asyncio.to_thread(self._unique_players)
+        await asyncio.to_thread(self._index_player_lookups, players)
         
-        players = self.db.execute_query(query)
+        logger.info(f"Preloaded {len(players)} player records")
         
-        # Create search indexes
+    def _unique_players(self) -> List[Dict]:
+        """Get unique (player, position, team, season) rows with their best fantasy output, ordered by name"""
+        players = {}
+        for record in self.preloaded_data.get('season_stats_all', []):
+            key = (record['player_name'], record['position'], record['team'], record['season'])
+            points = record['fantasy_points']
+            player = players.get(key)
+            if player is None:
+                players[key] = {
+                    "player_name": key[0], "position": key[1], "team": key[2], "season": key[3],
+                    "fantasy_points": points
+                }
+            elif points is not None and (player['fantasy_points'] is None or points > player['fantasy_points']):
+                player['fantasy_points'] = points
+        
+        return sorted(players.values(), key=itemgetter('player_name'))
+        
+    def _index_player_lookups(self, players: List[Dict]):
+        """Build the player lookup tables and search index (on a worker thread)"""
+        # Rows arrive ordered by name, so each player's rows form one run
         player_lookup = {}
-        position_players = {}
-        team_players = {}
-        
+        best_points = {}
+        for name, group in groupby(players, key=itemgetter('player_name')):
+            rows = list(group)
+            best_points[name] = max(row.pop('fantasy_points') or 0 for row in rows)
+            player_lookup[name] = rows
+        
+        position_players = defaultdict(list)
+        team_players = defaultdict(list)
         for player in players:
-            name = player['player_name']
-            position = player['position']
-            team = player['team']
-            
-            if name not in player_lookup:
-                player_lookup[name] = []
-            player_lookup[name].append(player)
-            
-            if position not in position_players:
-                position_players[position] = []
-            position_players[position].append(player)
-            
-            if team not in team_players:
-                team_players[team] = []
-            team_players[team].append(player)
+            position_players[player['position']].append(player)
+            team_players[player['team']].append(player)
         
         self.preloaded_data['player_lookup'] = player_lookup
-        self.preloaded_data['position_players'] = position_players
-        self.preloaded_data['team_players'] = team_players
+        self.preloaded_data['position_players'] = dict(position_players)
+        self.preloaded_data['team_players'] = dict(team_players)
+        self._build_search_index(player_lookup, best_points)
+        
+    def _build_search_index(self, player_lookup: Dict[str, List[Dict]],
+                            best_points: Dict[str, float]):
+        """Build a case-folded trigram index over the unique player names"""
+        names = list(player_lookup)
+        names_lower = [name.lower() for name in names]
+        gram_lists = {}
+        
+        for idx, name_lower in enumerate(names_lower):
+            for gram in self._search_grams(name_lower):
+                gram_lists.setdefault(gram, []).append(idx)
+        
+        # Row ids are appended in order, so every posting list is already sorted
+        self.preloaded_data['search_index'] = {
+            "names": names,
+            "names_lower": np.array(names_lower, dtype=str),
+            "points": np.array([best_points[name] for name in names], dtype=np.float64),
+            "grams": {k: np.array(v, dtype=np.int32) for k, v in gram_lists.items()}
+        }
         
-        logger.info(f"Preloaded {len(players)} player records")
+    @staticmethod
+    def _search_grams(text: str) -> set:
+        """Get the distinct search index n-grams of a lowercased string"""
+        return {text[i:i + SEARCH_GRAM_SIZE] for i in range(len(text) - SEARCH_GRAM_SIZE + 1)}
         
-    async def _preload_aggregated_views(self):
+    def _build_aggregated_views(self):
         """Preload common aggregated views"""
         logger.info("Preloading aggregated views...")
         
-        # Season averages by position
-        query = """
-        SELECT 
-            season,
-            position,
-            COUNT(*) as player_count,
-            AVG(fantasy_points) as avg_fantasy_points,
-            AVG(passing_yards) as avg_passing_yards,
-            AVG(rushing_yards) as avg_rushing_yards,
-            AVG(receiving_yards) as avg_receiving_yards,
-            AVG(receptions) as avg_receptions
-        FROM season_stats
-        GROUP BY season, position
-        ORDER BY season DESC, position
-        """
+        # Aggregated from the season table's columns (see _preload_season_views),
+        # so only the grouped and averaged fields are touched
+        table = self.preloaded_data.get('season_table')
+        if not table or not len(table['season']):
+            self.preloaded_data['position_averages'] = []
+            self.preloaded_data['team_stats'] = []
+            logger.info("Preloaded aggregated views")
+            return
+        
+        season_df = pd.DataFrame({
+            'season': table['season'],
+            'position': table['position']['values'][table['position']['codes']],
+            'team': table['team']['values'][table['team']['codes']],
+            **{field: table[field] for field in ('fantasy_points', 'passing_yards', 'rushing_yards',
+                                                 'receiving_yards', 'receptions')}
+        })
         
-        position_averages = self.db.execute_query(query)
-        self.preloaded_data['position_averages'] = position_averages
+        # Season averages by position
+        position_averages = (
+            season_df.groupby(['season', 'position'])
+            .agg(
+                player_count=('fantasy_points', 'size'),
+                avg_fantasy_points=('fantasy_points', 'mean'),
+                avg_passing_yards=('passing_yards', 'mean'),
+                avg_rushing_yards=('rushing_yards', 'mean'),
+                avg_receiving_yards=('receiving_yards', 'mean'),
+                avg_receptions=('receptions', 'mean')
+            )
+            .reset_index()
+            .sort_values(['season', 'position'], ascending=[False, True])
+        )
+        self.preloaded_data['position_averages'] = position_averages.to_dict('records')
         
         # Team statistics
-        query = """
-        SELECT 
-            season,
-            team,
-            COUNT(*) as player_count,
-            SUM(fantasy_points) as total_fantasy_points,
-            AVG(fantasy_points) as avg_fantasy_points
-        FROM season_stats
-        GROUP BY season, team
-        ORDER BY season DESC, total_fantasy_points DESC
-        """
-        
-        team_stats = self.db.execute_query(query)
-        self.preloaded_data['team_stats'] = team_stats
+        team_stats = (
+            season_df.groupby(['season', 'team'])
+            .agg(
+                player_count=('fantasy_points', 'size'),
+                total_fantasy_points=('fantasy_points', 'sum'),
+                avg_fantasy_points=('fantasy_points', 'mean')
+            )
+            .reset_index()
+            .sort_values(['season', 'total_fantasy_points'], ascending=[False, False])
+        )
+        self.preloaded_data['team_stats'] = team_stats.to_dict('records')
         
         logger.info("Preloaded aggregated views")
         
-    async def _preload_top_performers(self):
-        """Preload top performer lists for instant access"""
+    def _build_top_performers(self):
+        """Precompute ranked row indices for every season, position and stat"""
         logger.info("Preloading top performers...")
         
-        # Top performers by season and position
-        for season in [2023, 2024]:
-            for position in ['QB', 'RB', 'WR', 'TE']:
-                query = """
-                SELECT * FROM season_stats
-                WHERE season = ? AND position = ?
-                ORDER BY fantasy_points DESC
-                LIMIT 50
-                """
-                
-                top_players = self.db.execute_query(query, (season, position))
-                key = f"top_{season}_{position}"
-                self.preloaded_data[key] = top_players
-        
-        # Overall top performers
-        for season in [2023, 2024]:
-            query = """
-            SELECT * FROM season_stats
-            WHERE season = ?
-            ORDER BY fantasy_points DESC
-            LIMIT 100
-            """
-            
-            top_overall = self.db.execute_query(query, (season,))
-            self.preloaded_data[f"top_{season}_all"] = top_overall
-        
-        logger.info("Preloaded top performer lists")
+        # Built from the season table (see _preload_season_views)
+        table = self.preloaded_data.get('season_table', {})
+        groups = {
+            (season, None): row_ids
+            for season, row_ids in self.preloaded_data.get('season_index', {}).items()
+        }
+        groups.update(self.preloaded_data.get('season_position_index', {}))
+        
+        rankings = {}
+        for (season, position), row_ids in groups.items():
+            for stat_type in TOP_PERFORMER_STATS:
+                order = self._top_k_order(table[stat_type][row_ids], TOP_PERFORMER_DEPTH)
+                rankings[(season, position, stat_type)] = row_ids[order]
+        
+        self.preloaded_data['top_rankings'] = rankings
+        
+        logger.info(f"Preloaded {len(rankings)} top performer rankings")
+        
+    @staticmethod
+    def _top_k_order(values: np.ndarray, k: int) -> np.ndarray:
+        """Get positions of the k largest values, descending, ties in row order"""
+        if len(values) > k:
+            # Partial selection: keep everything at least as large as the k-th value
+            # (ties at the cutoff included) and only sort those candidates
+            kth = np.partition(-values, k - 1)[k - 1]
+            candidates = np.flatnonzero(-values <= kth)
+        else:
+            candidates = np.arange(len(values))
         
+        # Stable sort keeps the fantasy points row order for ties
+        order = np.argsort(-values[candidates], kind="stable")[:k]
+        return candidates[order]
+    
     def get_season_stats(self, season: Optional[int] = None, 
                         position: Optional[str] = None,
-                        limit: Optional[int] = None) -> List[Dict]:
+                        limit: Optional[int] = None) -> List[SeasonStatsRow]:
         """Get season stats with instant access from preloaded data"""
         if not self.is_loaded:
             logger.warning("Data not preloaded, falling back to database")
             return []
         
-        # Use preloaded indexed data for instant access
+        rows = self.select_season_rows(season=season, position=position)
+        
+        # Apply limit if specified
+        if limit:
+            rows = rows[:limit]
+            
+        return self.get_season_rows(rows)
+    
+    def select_season_rows(self, season: Optional[int] = None,
+                           position: Optional[str] = None,
+                           team: Optional[str] = None,
+                           player_name: Optional[str] = None) -> np.ndarray:
+        """Get the ids of season rows matching every filter, in row order (read-only)"""
+        return self._season_rows_cache(season, position, team, player_name)
+    
+    def _select_season_rows(self, season: Optional[int], position: Optional[str],
+                            team: Optional[str], player_name: Optional[str]) -> np.ndarray:
+        """Compute select_season_rows without memoization"""
+        table = self.preloaded_data.get('season_table')
+        if not table:
+            return np.empty(0, dtype=np.int32)
+        
+        # Start from the most specific index, then narrow with column compares
+        empty = np.empty(0, dtype=np.int32)
         if season and position:
-            key = f"{season}_{position}"
-            data = self.preloaded_data.get('season_by_season_position', {}).get(key, [])
+            rows = self.preloaded_data['season_position_index'].get((season, position), empty)
         elif season:
-            data = self.preloaded_data.get('season_by_season', {}).get(season, [])
+            rows = self.preloaded_data['season_index'].get(season, empty)
         elif position:
-            data = self.preloaded_data.get('season_by_position', {}).get(position, [])
+            rows = self.preloaded_data['position_index'].get(position, empty)
         else:
-            data = self.preloaded_data.get('season_stats_all', [])
+            rows = np.arange(len(table['season']), dtype=np.int32)
+        
+        if season and team:
+            # Both posting lists are sorted row ids, so this keeps row order
+            rows = np.intersect1d(rows, self.preloaded_data['season_team_index'].get((season, team), empty),
+                                  assume_unique=True)
+        elif team:
+            code = table['team']['categories'].get(team)
+            if code is None:
+                return empty
+            rows = rows[table['team']['codes'][rows] == code]
+        if player_name:
+            # Scan each distinct name once, then map the hits through the row codes
+            names = table['player_name']
+            hits = np.char.find(names['values_lower'], player_name.lower()) >= 0
+            rows = rows[hits[names['codes'][rows]]]
         
-        # Apply limit if specified
-        if limit:
-            data = data[:limit]
-            
-        return data
+        return rows
+    
+    def get_season_rows(self, rows: np.ndarray) -> List[SeasonStatsRow]:
+        """Materialize season records from row ids"""
+        season_data = self.preloaded_data.get('season_stats_all', [])
+        return [season_data[i] for i in rows]
+    
+    def get_season_columns(self, season: int, position: str) -> Optional[Dict[str, np.ndarray]]:
+        """Get the columnar summary fields for a season and position"""
+        if not self.is_loaded:
+            return None
+        
+        rows = self.preloaded_data.get('season_position_index', {}).get((season, position))
+        if rows is None:
+            return None
+        
+        table = self.preloaded_data['season_table']
+        return {
+            "names": table['player_name']['values'][table['player_name']['codes'][rows]],
+            "teams": table['team']['values'][table['team']['codes'][rows]],
+            "fantasy_points": table['fantasy_points'][rows]
+        }
+    
+    def get_season_stats_for_players(self, season: int,
+                                     player_names: List[str]) -> Dict[str, SeasonStatsRow]:
+        """Get one season row per requested player, keyed by lowercased name
+        
+        Exact names are resolved with a dict lookup; any names left over are
+        partial-matched against the season's lowercased name column.
+        """
+        if not self.is_loaded:
+            return {}
+        
+        by_season_name = self.preloaded_data.get('season_by_season_name', {})
+        found = {}
+        pending = []
+        
+        for name in player_names:
+            name_lower = name.lower()
+            record = by_season_name.get((season, name_lower))
+            if record is not None:
+                found[name_lower] = record
+            else:
+                pending.append(name_lower)
+        
+        for name_lower in pending:
+            rows = self.select_season_rows(season=season, player_name=name_lower)
+            if len(rows):
+                found[name_lower] = self.preloaded_data['season_stats_all'][rows[0]]
+        
+        return found
     
     def get_weekly_stats(self, season: Optional[int] = None,
                         week: Optional[int] = None,
                         position: Optional[str] = None,
                         player_name: Optional[str] = None,
-                        limit: Optional[int] = None) -> List[Dict]:
+                        limit: Optional[int] = None) -> List[PlayerStatsRow]:
         """Get weekly stats with instant access from preloaded data"""
         if not self.is_loaded:
             logger.warning("Data not preloaded, falling back to database")
             return []
         
-        # Use most specific index available
-        if player_name:
-            data = self.preloaded_data.get('weekly_by_player', {}).get(player_name, [])
-            if season:
-                data = [r for r in data if r['season'] == season]
-            if week:
-                data = [r for r in data if r['week'] == week]
-        elif season and week:
-            key = f"{season}_{week}"
-            data = self.preloaded_data.get('weekly_by_season_week', {}).get(key, [])
-            if position:
-                data = [r for r in data if r['position'] == position]
-        elif season:
-            data = self.preloaded_data.get('weekly_by_season', {}).get(season, [])
-            if position:
-                data = [r for r in data if r['position'] == position]
-            if week:
-                data = [r for r in data if r['week'] == week]
-        elif position:
-            data = self.preloaded_data.get('weekly_by_position', {}).get(position, [])
-            if season:
-                data = [r for r in data if r['season'] == season]
-            if week:
-                data = [r for r in data if r['week'] == week]
-        else:
-            data = self.preloaded_data.get('weekly_stats_all', [])
-            if season:
-                data = [r for r in data if r['season'] == season]
-            if week:
-                data = [r for r in data if r['week'] == week]
-            if position:
-                data = [r for r in data if r['position'] == position]
+        rows = self.select_weekly_rows(season=season, week=week, position=position,
+                                       player_name=player_name)
         
         # Apply limit if specified
         if limit:
-            data = data[:limit]
+            rows = rows[:limit]
+            
+        return self.get_weekly_rows(rows)
+    
+    def select_weekly_rows(self, season: Optional[int] = None,
+                           week: Optional[int] = None,
+                           position: Optional[str] = None,
+                           team: Optional[str] = None,
+                           player_name: Optional[str] = None) -> np.ndarray:
+        """Get the positions in weekly_stats_all of records matching every filter (read-only)"""
+        return self._weekly_rows_cache(season, week, position, team, player_name)
+    
+    def _select_weekly_rows(self, season: Optional[int], week: Optional[int],
+                            position: Optional[str], team: Optional[str],
+                            player_name: Optional[str]) -> np.ndarray:
+        """Compute select_weekly_rows without memoization"""
+        columns = self.preloaded_data.get('weekly_columns')
+        if not columns:
+            return np.empty(0, dtype=np.int32)
+        
+        # Intersect the posting lists covering the season's filters; filters they
+        # satisfy are cleared so only the remaining ones are checked against the columns
+        empty = np.empty(0, dtype=np.int32)
+        if season:
+            postings = []
+            if position and week:
+                postings.append(self.preloaded_data['weekly_season_week_position_index'].get(
+                    (season, week, position), empty))
+                position = week = None
+            elif position:
+                postings.append(self.preloaded_data['weekly_season_position_index'].get((season, position), empty))
+                position = None
+            elif week:
+                postings.append(self.preloaded_data['weekly_season_week_index'].get((season, week), empty))
+                week = None
+            if team:
+                postings.append(self.preloaded_data['weekly_season_team_index'].get((season, team), empty))
+                team = None
             
-        return data
+            if not postings:
+                rows = self.preloaded_data['weekly_season_index'].get(season, empty)
+            else:
+                # Posting lists are sorted row ids, so intersecting keeps row order
+                rows = postings[0]
+                for posting in postings[1:]:
+                    rows = np.intersect1d(rows, posting, assume_unique=True)
+        else:
+            rows = None
+        
+        # Remaining filters, most selective first
+        checks = []
+        for field, value in (('player_name', player_name), ('team', team),
+                             ('week', week), ('position', position)):
+            if not value:
+                continue
+            column = columns[field]
+            if isinstance(column, dict):
+                # Categorical columns compare by code
+                value = column['categories'].get(value)
+                if value is None:
+                    return empty
+                column = column['codes']
+            checks.append((column, value))
+        
+        if rows is None:
+            if not checks:
+                return np.arange(len(columns['season']), dtype=np.int32)
+            # No index applies; only the most selective filter scans the whole
+            # column, the rest compare just the rows it leaves
+            column, value = checks.pop(0)
+            rows = np.flatnonzero(column == value).astype(np.int32)
+        
+        # AND the remaining filters into one mask so the rows are compacted once
+        mask = None
+        for column, value in checks:
+            matches = column[rows] == value
+            if mask is None:
+                mask = matches
+            else:
+                mask &= matches
+        return rows if mask is None else rows[mask]
+    
+    def get_weekly_rows(self, rows: np.ndarray) -> List[PlayerStatsRow]:
+        """Materialize weekly records from positions returned by select_weekly_rows"""
+        weekly_data = self.preloaded_data.get('weekly_stats_all', [])
+        return [weekly_data[i] for i in rows]
+    
+    def get_weekly_stats_by_player(self, season: int, player_names: List[str],
+                                   weeks: Optional[List[int]] = None) -> Dict[str, List[PlayerStatsRow]]:
+        """Get a season's weekly records for several players in one scan
+        
+        Groups follow the order of player_names (unknown names are skipped);
+        each player's records keep their row order.
+        """
+        columns = self.preloaded_data.get('weekly_columns')
+        if not self.is_loaded or not columns:
+            return {}
+        
+        names = columns['player_name']
+        codes = [names['categories'][name] for name in dict.fromkeys(player_names)
+                 if name in names['categories']]
+        if not codes:
+            return {}
+        
+        rows = self.preloaded_data['weekly_season_index'].get(season, np.empty(0, dtype=np.int32))
+        row_codes = names['codes'][rows]
+        mask = np.isin(row_codes, codes)
+        if weeks:
+            mask &= np.isin(columns['week'][rows], weeks)
+        rows, row_codes = rows[mask], row_codes[mask]
+        
+        # A stable sort by name code groups the rows without reordering any player's
+        order = np.argsort(row_codes, kind='stable')
+        rows, row_codes = rows[order], row_codes[order]
+        starts = np.flatnonzero(np.diff(row_codes, prepend=-1))
+        
+        weekly_data = self.preloaded_data['weekly_stats_all']
+        groups = {
+            int(row_codes[start]): [weekly_data[i] for i in group]
+            for start, group in zip(starts, np.split(rows, starts[1:]))
+        }
+        return {names['values'][code]: groups[code] for code in codes if code in groups}
     
     def get_top_performers(self, season: int, position: Optional[str] = None, 
-                          limit: int = 20) -> List[Dict]:
+                          stat_type: str = "fantasy_points",
+                          limit: int = 20) -> List[SeasonStatsRow]:
         """Get top performers with instant access"""
         if not self.is_loaded:
             return []
         
-        if position:
-            key = f"top_{season}_{position}"
-            data = self.preloaded_data.get(key, [])
-        else:
-            key = f"top_{season}_all"
-            data = self.preloaded_data.get(key, [])
+        ranking = self.preloaded_data.get('top_rankings', {}).get((season, position, stat_type))
+        if ranking is None:
+            return []
         
-        return data[:limit]
+        return self.get_season_rows(ranking[:limit])
     
     def search_players(self, query: str, limit: int = 20) -> List[Dict]:
         """Search players with instant access"""
         if not self.is_loaded:
             return []
         
-        query_lower = query.lower()
-        results = []
+        return list(self._search_cache(query.lower(), limit))
+    
+    def _search_players(self, query_lower: str, limit: int) -> List[Dict]:
+        """Compute search_players for a lowercased query without memoization"""
+        index = self.preloaded_data.get('search_index')
+        if not index or not query_lower:
+            return []
+        
+        # Candidates must contain every trigram of the query; shorter queries
+        # have none and are checked against every name
+        names_lower = index["names_lower"]
+        grams = self._search_grams(query_lower)
+        if not grams:
+            candidates = np.arange(len(names_lower), dtype=np.int32)
+        else:
+            postings = [index["grams"].get(gram) for gram in grams]
+            if any(posting is None for posting in postings):
+                return []
+            # Intersect from the rarest gram so the candidate set shrinks fastest
+            postings.sort(key=len)
+            candidates = postings[0]
+            for posting in postings[1:]:
+                candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        
+        # Trigrams can match out of order, so confirm the substring in one C-level scan
+        matches = candidates[np.char.find(names_lower[candidates], query_lower) >= 0]
+        if not len(matches):
+            return []
+        
+        # Rank by best fantasy output, partially sorting only the top entries
+        points = index["points"][matches]
+        if len(matches) > limit:
+            top = np.argpartition(-points, limit - 1)[:limit]
+            matches, points = matches[top], points[top]
+        matches = matches[np.argsort(-points, kind='stable')]
         
         player_lookup = self.preloaded_data.get('player_lookup', {})
+        names = index["names"]
+        results = []
         
-        for player_name, player_data in player_lookup.items():
-            if query_lower in player_name.lower():
-                results.extend(player_data)
-                if len(results) >= limit:
-                    break
+        for idx in matches:
+            results.extend(player_lookup[names[idx]])
+            if len(results) >= limit:
+                break
         
         return results[:limit]
     
+    def bump_generation(self):
+        """Mark responses derived from the preloaded data as outdated"""
+        self.generation += 1
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get preloader statistics"""
         if not self.is_loaded:
@@ -376,8 +889,7 @@ class DataPreloader:
         stats = {
             "status": "loaded",
             "datasets": len(self.preloaded_data),
-            "total_records": sum(len(data) if isinstance(data, list) else 1 
-                               for data in self.preloaded_data.values())
+            "total_records": self.total_records
         }
         
         # Add dataset-specific stats
@@ -3,33 +3,81 @@ Optimized ETL service for loading NFL data efficiently
 """
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Iterator
 from datetime import datetime, timezone
 import nflreadpy as nfl
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+import polars as pl
+from contextlib import nullcontext
 
 from app.utils.database import get_db
-from app.utils.fantasy_points import calculate_fantasy_points, validate_stats_data
-from app.utils.cache import invalidate_player_cache
+from app.utils.fantasy_points import fantasy_points_expr
+from app.utils.cache import invalidate_season_cache
 from app.config.settings import ETL_CONFIG, SKILL_POSITIONS
 
 logger = logging.getLogger(__name__)
 
+# Numeric stat columns taken from nflreadpy weekly data and the type each is cast to once,
+# filled with 0 when missing
+WEEKLY_DTYPES = {
+    'passing_yards': pl.Float64,
+    'passing_tds': pl.Int64,
+    'interceptions': pl.Int64,
+    'rushing_yards': pl.Float64,
+    'rushing_tds': pl.Int64,
+    'receptions': pl.Int64,
+    'receiving_yards': pl.Float64,
+    'receiving_tds': pl.Int64,
+    'targets': pl.Int64,
+    'fumbles_lost': pl.Int64
+}
+
+# Numeric columns taken from nflreadpy snap count data
+SNAP_DTYPES = {
+    'offense_snaps': pl.Int64,
+    'offense_pct': pl.Float64,
+    'defense_snaps': pl.Int64,
+    'defense_pct': pl.Float64,
+    'st_snaps': pl.Int64,
+    'st_pct': pl.Float64
+}
+
+# Columns refreshed when a reloaded row already exists. Indexed columns cannot be
+# updated in DuckDB and are implied by the row id anyway; the snap and DK columns
+# of weekly_stats are populated separately, so a reload leaves them alone.
+WEEKLY_UPSERT_COLUMNS = ['player_name', 'opponent', *WEEKLY_DTYPES, 'fantasy_points']
+SNAP_UPSERT_COLUMNS = ['player_name', 'team', *SNAP_DTYPES, 'position', 'game_id', 'opponent_team']
+
+# Season aggregates with no weekly rows left behind them (ids as built by _generate_season_stats)
+STALE_SEASON_STATS_DELETE = """
+    DELETE FROM season_stats
+    WHERE season = $season
+      AND id NOT IN (
+          SELECT 'season_' || $season || '_' || REPLACE(player_name, ' ', '_') || '_' || team
+          FROM weekly_stats
+          WHERE season = $season
+      )
+"""
+
+# nflreadpy columns the ETL reads; everything else is dropped before any processing
+REQUIRED_WEEKLY_COLS = ['player_display_name', 'position', 'recent_team', 'team', 'week',
+                        'opponent_team', *WEEKLY_DTYPES]
+REQUIRED_SNAP_COLS = ['player', 'position', 'team', 'week', 'game_id', 'opponent', *SNAP_DTYPES]
+
 class ETLService:
     """Optimized ETL service for NFL data"""
     
     def __init__(self):
         self.db = get_db()
-        self.executor = ThreadPoolExecutor(max_workers=ETL_CONFIG["max_workers"])
     
-    async def load_season_data(self, seasons: List[int], include_current_season_extras: bool = True) -> Dict[str, Any]:
+    async def load_season_data(self, seasons: List[int], include_current_season_extras: bool = True,
+                               use_bulk: bool = True) -> Dict[str, Any]:
         """
         Load complete season data efficiently
         
         Args:
             seasons: List of seasons to load
             include_current_season_extras: Whether to include snap counts and DK pricing for current season
+            use_bulk: Write each season's weekly stats, aggregates and snap counts in one transaction
             
         Returns:
             Dict with loading results
@@ -38,35 +86,40 @@ class ETLService:
             "seasons_loaded": [],
             "total_weekly_records": 0,
             "total_season_records": 0,
+            "total_snap_records": 0,
             "errors": []
         }
         
         try:
-            for season in seasons:
-                logger.info(f"Loading data for season {season}")
-                
-                # Load weekly stats
-                weekly_result = await self._load_weekly_stats(season)
-                results["total_weekly_records"] += weekly_result.get("records_loaded", 0)
-                
-                # Generate season aggregates
-                season_result = await self._generate_season_stats(season)
-                results["total_season_records"] += season_result.get("records_loaded", 0)
-                
-                # Load current season extras (snap counts, DK pricing) only for current season
-                if include_current_season_extras and season >= 2024:
-                    try:
-                        await self._load_snap_counts(season)
-                        # Note: DK pricing would be loaded separately via API calls
-                    except Exception as e:
-                        logger.warning(f"Failed to load extras for season {season}: {e}")
-                        results["errors"].append(f"Season {season} extras: {str(e)}")
-                
+            # Seasons load concurrently so one season's download overlaps another's writes;
+            # each season's DB work runs without awaiting, so transactions never interleave
+            semaphore = asyncio.Semaphore(ETL_CONFIG["max_concurrent_seasons"])
+            with self.db.bulk_load():
+                season_results = await asyncio.gather(
+                    *(self._load_one_season(season, include_current_season_extras, use_bulk, semaphore)
+                      for season in seasons),
+                    return_exceptions=True
+                )
+            
+            failures = []
+            for season, season_result in zip(seasons, season_results):
+                if isinstance(season_result, Exception):
+                    failures.append(season_result)
+                    continue
+                results["total_weekly_records"] += season_result["weekly_records"]
+                results["total_season_records"] += season_result["season_records"]
+                results["total_snap_records"] += season_result["snap_records"]
+                results["errors"].extend(season_result["errors"])
                 results["seasons_loaded"].append(season)
-                logger.info(f"Completed loading season {season}")
+                
+                # Drop cached entries only for seasons whose reload wrote rows;
+                # an empty reload (e.g. off-season) leaves their entries warm
+                if season_result["weekly_records"] or season_result["season_records"] \
+                        or season_result["snap_records"]:
+                    invalidate_season_cache(season)
             
-            # Clear cache after loading new data
-            invalidate_player_cache("all", 0)
+            if failures:
+                raise failures[0]
             
         except Exception as e:
             logger.error(f"ETL process failed: {e}")
@@ -75,50 +128,95 @@ class ETLService:
         
         return results
     
-    async def _load_weekly_stats(self, season: int) -> Dict[str, Any]:
-        """Load weekly player stats for a season"""
+    async def _load_one_season(self, season: int, include_current_season_extras: bool,
+                               use_bulk: bool, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Load weekly stats, season aggregates and extras for one season"""
+        async with semaphore:
+            logger.info(f"Loading data for season {season}")
+            result = {"weekly_records": 0, "season_records": 0, "snap_records": 0, "errors": []}
+            
+            # One timestamp stamps every row the season writes
+            loaded_at = datetime.now(timezone.utc)
+            
+            # Start the snap count download now so it overlaps the weekly download and processing
+            load_extras = include_current_season_extras and season >= 2024
+            snap_fetch = self._start_fetch(self._fetch_snap_data, season) if load_extras else None
+            
+            # Download and process weekly stats
+            weekly_records = await self._weekly_records(season, loaded_at)
+            
+            # Current season extras (snap counts, DK pricing) only for current season
+            snap_records = None
+            if load_extras:
+                try:
+                    snap_records = await self._snap_records(season, loaded_at, snap_fetch)
+                    # Note: DK pricing would be loaded separately via API calls
+                except Exception as e:
+                    logger.warning(f"Failed to load extras for season {season}: {e}")
+                    result["errors"].append(f"Season {season} extras: {str(e)}")
+            
+            # All of the season's writes share one transaction and commit once; nothing
+            # in it awaits, so concurrent seasons never interleave on the connection
+            with self.db.transaction() if use_bulk else nullcontext():
+                weekly_result = self._write_weekly_stats(season, weekly_records)
+                result["weekly_records"] = weekly_result.get("records_loaded", 0)
+                
+                # Generate season aggregates
+                season_result = self._generate_season_stats(season, loaded_at)
+                result["season_records"] = season_result.get("records_loaded", 0)
+            
+            # Extras are best-effort: written after the season commits, in their own
+            # transaction, so a failure cannot roll back the season's stats
+            if snap_records is not None:
+                try:
+                    snap_result = self._write_snap_counts(season, snap_records)
+                    result["snap_records"] = snap_result.get("records_loaded", 0)
+                except Exception as e:
+                    logger.warning(f"Failed to write extras for season {season}: {e}")
+                    result["errors"].append(f"Season {season} extras: {str(e)}")
+            
+            logger.info(f"Completed loading season {season}")
+            return result
+    
+    async def _weekly_records(self, season: int, loaded_at: datetime) -> Optional[pl.DataFrame]:
+        """Download a season's weekly player stats and build its weekly records (None when there are none)"""
         try:
             logger.info(f"Loading weekly stats for season {season}")
             
             # Load data using nflreadpy in a thread
-            loop = asyncio.get_event_loop()
-            weekly_data = await loop.run_in_executor(
-                self.executor, 
-                self._fetch_weekly_data, 
-                season
-            )
+            weekly_data = await asyncio.to_thread(self._fetch_weekly_data, season)
             
             if weekly_data is None or len(weekly_data) == 0:
                 logger.warning(f"No weekly data found for season {season}")
-                return {"records_loaded": 0}
-            
-            # Convert to pandas and process
-            df = weekly_data.to_pandas()
+                return None
             
-            # Filter for skill positions only
-            df = df[df['position'].isin(SKILL_POSITIONS)]
+            # Keep only the used columns and skill positions, staying in Polars (no pandas copy)
+            df = self._skill_rows(weekly_data, REQUIRED_WEEKLY_COLS)
             
             # Clean and validate data
-            processed_records = []
-            for _, row in df.iterrows():
-                try:
-                    record = self._process_weekly_record(row, season)
-                    if record:
-                        processed_records.append(record)
-                except Exception as e:
-                    logger.warning(f"Failed to process record: {e}")
-                    continue
-            
-            # Batch insert
-            if processed_records:
-                # Clear existing data for this season
-                self.db.connection.execute("DELETE FROM weekly_stats WHERE season = ?", [season])
+            return self._process_weekly_records(df, season, loaded_at)
                 
-                records_loaded = self.db.execute_batch_insert(
-                    "weekly_stats", 
-                    processed_records, 
-                    batch_size=ETL_CONFIG["batch_size"]
-                )
+        except Exception as e:
+            logger.error(f"Failed to load weekly stats for season {season}: {e}")
+            raise
+    
+    def _write_weekly_stats(self, season: int, processed_records: Optional[pl.DataFrame]) -> Dict[str, Any]:
+        """Upsert a season's weekly records (joins the caller's transaction, if any)"""
+        try:
+            # Batch insert
+            if processed_records is not None:
+                # The season's rows missing from the load are removed, existing rows
+                # are updated in place, and the secondary indexes are rebuilt once
+                with self.db.deferred_indexes("weekly_stats"):
+                    self.db.delete_missing("weekly_stats", "id", processed_records["id"].to_arrow(),
+                                           "season = ?", [season])
+                    records_loaded = self.db.execute_batch_insert(
+                        "weekly_stats", 
+                        self._record_batches(processed_records), 
+                        batch_size=ETL_CONFIG["batch_size"],
+                        conflict_key="id",
+                        update_columns=WEEKLY_UPSERT_COLUMNS
+                    )
                 
                 logger.info(f"Loaded {records_loaded} weekly records for season {season}")
                 return {"records_loaded": records_loaded}
@@ -130,6 +228,16 @@ class ETLService:
             logger.error(f"Failed to load weekly stats for season {season}: {e}")
             raise
     
+    @staticmethod
+    def _record_batches(records: pl.DataFrame) -> Iterator[Dict[str, Any]]:
+        """Yield record dicts one insert batch at a time, so only a batch is ever materialized"""
+        for batch in records.iter_slices(ETL_CONFIG["batch_size"]):
+            yield from batch.to_dicts()
+    
+    def _start_fetch(self, fetch: Callable[[int], Any], season: int) -> asyncio.Task:
+        """Start an nflreadpy download on the loop's default executor without waiting for it"""
+        return asyncio.create_task(asyncio.to_thread(fetch, season))
+    
     def _fetch_weekly_data(self, season: int):
         """Fetch weekly data using nflreadpy (runs in thread)"""
         try:
@@ -138,187 +246,206 @@ class ETLService:
             logger.error(f"nflreadpy failed for season {season}: {e}")
             return None
     
-    def _process_weekly_record(self, row: pd.Series, season: int) -> Optional[Dict[str, Any]]:
-        """Process a single weekly record"""
-        try:
-            # Extract basic info
-            player_name = str(row.get('player_display_name', ''))
-            if not player_name:
-                return None
-            
-            # Create unique ID
-            week = int(row.get('week', 0))
-            player_id = f"{season}_{week}_{player_name.replace(' ', '_')}"
-            record_id = f"{player_id}_{row.get('team', '')}"
-            
-            # Build record
-            record = {
-                'id': record_id,
-                'player_id': player_id,
-                'player_name': player_name,
-                'position': str(row.get('position', '')),
-                'team': str(row.get('recent_team', row.get('team', ''))),
-                'season': season,
-                'week': week,
-                'opponent': str(row.get('opponent_team', '')),
-                'passing_yards': float(row.get('passing_yards', 0) or 0),
-                'passing_tds': int(row.get('passing_tds', 0) or 0),
-                'interceptions': int(row.get('interceptions', 0) or 0),
-                'rushing_yards': float(row.get('rushing_yards', 0) or 0),
-                'rushing_tds': int(row.get('rushing_tds', 0) or 0),
-                'receptions': int(row.get('receptions', 0) or 0),
-                'receiving_yards': float(row.get('receiving_yards', 0) or 0),
-                'receiving_tds': int(row.get('receiving_tds', 0) or 0),
-                'targets': int(row.get('targets', 0) or 0),
-                'fumbles_lost': int(row.get('fumbles_lost', 0) or 0),
-                'snap_percentage': None,  # Will be populated separately if available
-                'snap_count': None,
-                'dk_salary': None,  # Will be populated separately if available
-                'created_at': datetime.now(timezone.utc)
-            }
-            
-            # Validate and clean data
-            record = validate_stats_data(record)
-            
-            # Calculate fantasy points
-            record['fantasy_points'] = calculate_fantasy_points(record)
-            
-            return record
-            
-        except Exception as e:
-            logger.warning(f"Failed to process weekly record: {e}")
+    @staticmethod
+    def _skill_rows(data: pl.DataFrame, columns: List[str]) -> pl.DataFrame:
+        """Select the columns the ETL uses (when present) and keep skill-position rows"""
+        data = data.select([column for column in columns if column in data.columns])
+        return data.filter(pl.col('position').is_in(list(SKILL_POSITIONS)))
+    
+    @staticmethod
+    def _text_column(df: pl.DataFrame, column: str, fallback: Optional[pl.Expr] = None) -> pl.Expr:
+        """Get a column as strings, filling gaps from fallback (or '' when absent)"""
+        if fallback is None:
+            fallback = pl.lit('')
+        if column not in df.columns:
+            return fallback
+        return pl.col(column).cast(pl.Utf8).fill_null(fallback)
+    
+    @staticmethod
+    def _numeric_column(df: pl.DataFrame, column: str, dtype: pl.DataType) -> pl.Expr:
+        """Get a column as numbers, treating missing or unparseable values as 0"""
+        if column not in df.columns:
+            return pl.lit(0, dtype=dtype)
+        return pl.col(column).cast(pl.Float64, strict=False).fill_nan(0).fill_null(0).cast(dtype)
+    
+    @staticmethod
+    def _named_rows(df: pl.DataFrame, name_column: str) -> pl.DataFrame:
+        """Drop rows without a player name and make the week column integral"""
+        names = pl.col(name_column).cast(pl.Utf8)
+        df = df.filter(names.is_not_null() & (names != ''))
+        return df.with_columns(week=ETLService._numeric_column(df, 'week', pl.Int64))
+    
+    @staticmethod
+    def _player_id(name_column: str, season: int) -> pl.Expr:
+        """Build '<season>_<week>_<Player_Name>' ids"""
+        return pl.concat_str([
+            pl.lit(f"{season}_"), pl.col('week').cast(pl.Utf8), pl.lit("_"),
+            pl.col(name_column).cast(pl.Utf8).str.replace_all(' ', '_', literal=True)
+        ])
+    
+    def _process_weekly_records(self, df: pl.DataFrame, season: int,
+                                loaded_at: datetime) -> Optional[pl.DataFrame]:
+        """Build weekly records from the skill-position rows with column operations"""
+        df = self._named_rows(df, 'player_display_name')
+        if df.is_empty():
             return None
+        
+        # Build the id once as a column; both the row id and player_id read it
+        df = df.with_columns(player_id=self._player_id('player_display_name', season))
+        player_id = pl.col('player_id')
+        id_team = self._text_column(df, 'team')
+        
+        records = df.select(
+            id=pl.concat_str([player_id, pl.lit("_"), id_team]),
+            player_id=player_id,
+            player_name=pl.col('player_display_name').cast(pl.Utf8),
+            position=self._text_column(df, 'position'),
+            team=self._text_column(df, 'recent_team', id_team),
+            season=pl.lit(season),
+            week=pl.col('week'),
+            opponent=self._text_column(df, 'opponent_team'),
+            **{field: self._numeric_column(df, field, dtype) for field, dtype in WEEKLY_DTYPES.items()},
+            snap_percentage=pl.lit(None, dtype=pl.Float64),  # Will be populated separately if available
+            snap_count=pl.lit(None, dtype=pl.Int64),
+            dk_salary=pl.lit(None, dtype=pl.Int64),  # Will be populated separately if available
+            created_at=pl.lit(loaded_at)
+        ).with_columns(
+            # Columns are already typed and null-filled, so points are scored for every row at once
+            fantasy_points=fantasy_points_expr(WEEKLY_DTYPES)
+        )
+        
+        return records
     
-    async def _generate_season_stats(self, season: int) -> Dict[str, Any]:
-        """Generate aggregated season stats from weekly data"""
+    def _generate_season_stats(self, season: int, loaded_at: datetime) -> Dict[str, Any]:
+        """Generate aggregated season stats from weekly data (joins the caller's transaction, if any)"""
         try:
             logger.info(f"Generating season stats for {season}")
             
-            # Query weekly stats for aggregation
+            # Aggregate and insert inside the database; no rows round-trip through Python
             query = """
+                INSERT INTO season_stats (
+                    id, player_id, player_name, position, team, season, games_played,
+                    passing_yards, passing_tds, interceptions, rushing_yards, rushing_tds,
+                    receptions, receiving_yards, receiving_tds, targets, fumbles_lost,
+                    fantasy_points, created_at, updated_at
+                )
                 SELECT 
+                    'season_' || player_id || '_' || team,
+                    player_id,
                     player_name,
                     position,
                     team,
-                    COUNT(*) as games_played,
-                    SUM(passing_yards) as passing_yards,
-                    SUM(passing_tds) as passing_tds,
-                    SUM(interceptions) as interceptions,
-                    SUM(rushing_yards) as rushing_yards,
-                    SUM(rushing_tds) as rushing_tds,
-                    SUM(receptions) as receptions,
-                    SUM(receiving_yards) as receiving_yards,
-                    SUM(receiving_tds) as receiving_tds,
-                    SUM(targets) as targets,
-                    SUM(fumbles_lost) as fumbles_lost,
-                    SUM(fantasy_points) as fantasy_points
-                FROM weekly_stats 
-                WHERE season = ? 
-                GROUP BY player_name, position, team
-                HAVING games_played > 0
+                    season,
+                    games_played,
+                    passing_yards, passing_tds, interceptions, rushing_yards, rushing_tds,
+                    receptions, receiving_yards, receiving_tds, targets, fumbles_lost,
+                    fantasy_points,
+                    $loaded_at,
+                    $loaded_at
+                FROM (
+                    SELECT 
+                        $season || '_' || REPLACE(player_name, ' ', '_') as player_id,
+                        player_name,
+                        position,
+                        team,
+                        $season as season,
+                        COUNT(*) as games_played,
+                        COALESCE(SUM(passing_yards), 0) as passing_yards,
+                        COALESCE(SUM(passing_tds), 0) as passing_tds,
+                        COALESCE(SUM(interceptions), 0) as interceptions,
+                        COALESCE(SUM(rushing_yards), 0) as rushing_yards,
+                        COALESCE(SUM(rushing_tds), 0) as rushing_tds,
+                        COALESCE(SUM(receptions), 0) as receptions,
+                        COALESCE(SUM(receiving_yards), 0) as receiving_yards,
+                        COALESCE(SUM(receiving_tds), 0) as receiving_tds,
+                        COALESCE(SUM(targets), 0) as targets,
+                        COALESCE(SUM(fumbles_lost), 0) as fumbles_lost,
+                        COALESCE(SUM(fantasy_points), 0) as fantasy_points
+                    FROM weekly_stats 
+                    WHERE season = $season 
+                    GROUP BY player_name, position, team
+                )
+                ON CONFLICT (id) DO UPDATE SET
+                    player_name = excluded.player_name,
+                    team = excluded.team,
+                    games_played = excluded.games_played,
+                    passing_yards = excluded.passing_yards,
+                    passing_tds = excluded.passing_tds,
+                    interceptions = excluded.interceptions,
+                    rushing_yards = excluded.rushing_yards,
+                    rushing_tds = excluded.rushing_tds,
+                    receptions = excluded.receptions,
+                    receiving_yards = excluded.receiving_yards,
+                    receiving_tds = excluded.receiving_tds,
+                    targets = excluded.targets,
+                    fumbles_lost = excluded.fumbles_lost,
+                    fantasy_points = excluded.fantasy_points,
+                    updated_at = excluded.updated_at
             """
+            params = {"season": season, "loaded_at": loaded_at}
             
-            results = self.db.execute_query(query, [season])
+            # Rows whose player/team no longer appears in the weekly data are removed
+            # first (so they cannot collide with their replacements), existing rows
+            # are updated in place, and the secondary indexes are rebuilt once
+            with self.db.transaction(), self.db.deferred_indexes("season_stats"):
+                self.db.connection.execute(STALE_SEASON_STATS_DELETE, {"season": season})
+                records_loaded = self.db.connection.execute(query, params).fetchone()[0]
             
-            if not results:
+            if not records_loaded:
                 logger.warning(f"No weekly data found to aggregate for season {season}")
                 return {"records_loaded": 0}
             
-            # Process aggregated data
-            season_records = []
-            for row in results:
-                try:
-                    player_id = f"{season}_{row['player_name'].replace(' ', '_')}"
-                    record_id = f"season_{player_id}_{row['team']}"
-                    
-                    record = {
-                        'id': record_id,
-                        'player_id': player_id,
-                        'player_name': row['player_name'],
-                        'position': row['position'],
-                        'team': row['team'],
-                        'season': season,
-                        'games_played': row['games_played'],
-                        'passing_yards': float(row['passing_yards'] or 0),
-                        'passing_tds': int(row['passing_tds'] or 0),
-                        'interceptions': int(row['interceptions'] or 0),
-                        'rushing_yards': float(row['rushing_yards'] or 0),
-                        'rushing_tds': int(row['rushing_tds'] or 0),
-                        'receptions': int(row['receptions'] or 0),
-                        'receiving_yards': float(row['receiving_yards'] or 0),
-                        'receiving_tds': int(row['receiving_tds'] or 0),
-                        'targets': int(row['targets'] or 0),
-                        'fumbles_lost': int(row['fumbles_lost'] or 0),
-                        'fantasy_points': float(row['fantasy_points'] or 0),
-                        'created_at': datetime.now(timezone.utc),
-                        'updated_at': datetime.now(timezone.utc)
-                    }
-                    
-                    season_records.append(record)
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to process season record: {e}")
-                    continue
-            
-            if season_records:
-                # Clear existing season data
-                self.db.connection.execute("DELETE FROM season_stats WHERE season = ?", [season])
-                
-                records_loaded = self.db.execute_batch_insert(
-                    "season_stats", 
-                    season_records, 
-                    batch_size=ETL_CONFIG["batch_size"]
-                )
-                
-                logger.info(f"Generated {records_loaded} season records for {season}")
-                return {"records_loaded": records_loaded}
-            else:
-                return {"records_loaded": 0}
+            logger.info(f"Generated {records_loaded} season records for {season}")
+            return {"records_loaded": records_loaded}
                 
         except Exception as e:
             logger.error(f"Failed to generate season stats for {season}: {e}")
             raise
     
-    async def _load_snap_counts(self, season: int) -> Dict[str, Any]:
-        """Load snap counts for current season (optional)"""
+    async def _snap_records(self, season: int, loaded_at: datetime,
+                            snap_fetch: Optional[asyncio.Future] = None) -> Optional[pl.DataFrame]:
+        """Download and build snap count records (optional), from an already started fetch if given"""
         try:
             logger.info(f"Loading snap counts for season {season}")
             
             # Load snap counts in thread
-            loop = asyncio.get_event_loop()
-            snap_data = await loop.run_in_executor(
-                self.executor,
-                self._fetch_snap_data,
-                season
-            )
+            if snap_fetch is None:
+                snap_fetch = self._start_fetch(self._fetch_snap_data, season)
+            snap_data = await snap_fetch
             
             if snap_data is None or len(snap_data) == 0:
                 logger.warning(f"No snap count data found for season {season}")
-                return {"records_loaded": 0}
+                return None
             
             # Process snap count data
-            df = snap_data.to_pandas()
-            df = df[df['position'].isin(SKILL_POSITIONS)]
+            df = self._skill_rows(snap_data, REQUIRED_SNAP_COLS)
             
-            snap_records = []
-            for _, row in df.iterrows():
-                try:
-                    record = self._process_snap_record(row, season)
-                    if record:
-                        snap_records.append(record)
-                except Exception as e:
-                    logger.warning(f"Failed to process snap record: {e}")
-                    continue
-            
-            if snap_records:
-                # Clear existing snap data for this season
-                self.db.connection.execute("DELETE FROM snap_counts WHERE season = ?", [season])
+            return self._process_snap_records(df, season, loaded_at)
                 
-                records_loaded = self.db.execute_batch_insert(
-                    "snap_counts",
-                    snap_records,
-                    batch_size=ETL_CONFIG["batch_size"]
-                )
+        except Exception as e:
+            logger.error(f"Failed to load snap counts for season {season}: {e}")
+            return None
+    
+    def _write_snap_counts(self, season: int, snap_records: Optional[pl.DataFrame]) -> Dict[str, Any]:
+        """Upsert a season's snap count records (joins the caller's transaction, if any)
+        
+        Write errors roll back the snap counts and propagate to the caller.
+        """
+        try:
+            if snap_records is not None:
+                # One transaction for every upsert batch; the season's rows missing from
+                # the load are removed, existing rows are updated in place, and the
+                # secondary indexes are rebuilt once after the last batch
+                with self.db.transaction(), self.db.deferred_indexes("snap_counts"):
+                    self.db.delete_missing("snap_counts", "id", snap_records["id"].to_arrow(),
+                                           "season = ?", [season])
+                    records_loaded = self.db.execute_batch_insert(
+                        "snap_counts",
+                        self._record_batches(snap_records),
+                        batch_size=ETL_CONFIG["batch_size"],
+                        conflict_key="id",
+                        update_columns=SNAP_UPSERT_COLUMNS
+                    )
                 
                 logger.info(f"Loaded {records_loaded} snap count records for season {season}")
                 return {"records_loaded": records_loaded}
@@ -327,7 +454,7 @@ class ETLService:
                 
         except Exception as e:
             logger.error(f"Failed to load snap counts for season {season}: {e}")
-            return {"records_loaded": 0}
+            raise
     
     def _fetch_snap_data(self, season: int):
         """Fetch snap count data using nflreadpy (runs in thread)"""
@@ -337,45 +464,39 @@ class ETLService:
             logger.error(f"nflreadpy snap counts failed for season {season}: {e}")
             return None
     
-    def _process_snap_record(self, row: pd.Series, season: int) -> Optional[Dict[str, Any]]:
-        """Process a single snap count record"""
-        try:
-            player_name = str(row.get('player', ''))
-            if not player_name:
-                return None
-            
-            week = int(row.get('week', 0))
-            player_id = f"{season}_{week}_{player_name.replace(' ', '_')}"
-            record_id = f"snap_{player_id}_{row.get('team', '')}"
-            
-            record = {
-                'id': record_id,
-                'player_id': player_id,
-                'player_name': player_name,
-                'team': str(row.get('team', '')),
-                'season': season,
-                'week': week,
-                'offense_snaps': int(row.get('offense_snaps', 0) or 0),
-                'offense_pct': float(row.get('offense_pct', 0) or 0),
-                'defense_snaps': int(row.get('defense_snaps', 0) or 0),
-                'defense_pct': float(row.get('defense_pct', 0) or 0),
-                'st_snaps': int(row.get('st_snaps', 0) or 0),
-                'st_pct': float(row.get('st_pct', 0) or 0),
-                'position': str(row.get('position', '')),
-                'game_id': str(row.get('game_id', '')),
-                'opponent_team': str(row.get('opponent', '')),
-                'created_at': datetime.now(timezone.utc)
-            }
-            
-            return record
-            
-        except Exception as e:
-            logger.warning(f"Failed to process snap record: {e}")
+    def _process_snap_records(self, df: pl.DataFrame, season: int,
+                              loaded_at: datetime) -> Optional[pl.DataFrame]:
+        """Build snap count records from the skill-position rows with column operations"""
+        df = self._named_rows(df, 'player')
+        if df.is_empty():
             return None
+        
+        df = df.with_columns(player_id=self._player_id('player', season))
+        player_id = pl.col('player_id')
+        team = self._text_column(df, 'team')
+        
+        records = df.select(
+            id=pl.concat_str([pl.lit("snap_"), player_id, pl.lit("_"), team]),
+            player_id=player_id,
+            player_name=pl.col('player').cast(pl.Utf8),
+            team=team,
+            season=pl.lit(season),
+            week=pl.col('week'),
+            **{field: self._numeric_column(df, field, dtype) for field, dtype in SNAP_DTYPES.items()},
+            position=self._text_column(df, 'position'),
+            game_id=self._text_column(df, 'game_id'),
+            opponent_team=self._text_column(df, 'opponent'),
+            created_at=pl.lit(loaded_at)
+        )
+        
+        return records
 
-# Global ETL service instance
-etl_service = ETLService()
+# Global ETL service instance, created on first use
+_etl_service = None
 
 def get_etl_service() -> ETLService:
     """Get ETL service instance"""
-    return etl_service
\ No newline at end of file
+    global _etl_service
+    if _etl_service is None:
+        _etl_service = ETLService()
+    return _etl_service
\ No newline at end of file
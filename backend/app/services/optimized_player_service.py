@@ -2,16 +2,91 @@
 Ultra-optimized player service with preloaded data for instant access
 """
 import logging
-from typing import List, Dict, Optional, Any
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+import numpy as np
+import orjson
+import pyarrow as pa
+from typing import List, Dict, Optional, Any, Iterator, get_args
+from app.config.settings import CACHE_CONFIG, SKILL_POSITIONS, TOP_PERFORMER_STATS
+from app.models.player import PlayerStatsRow, SeasonStatsRow
 from app.utils.database import DatabaseManager
 from app.services.data_preloader import get_preloader
 
 logger = logging.getLogger(__name__)
 
+# Default page served by /weekly-stats when only season and position are given
+HOT_PAGE_SIZE = 100
+
+# Rows fetched per query when streaming weekly stats from the database
+STREAM_PAGE_SIZE = 1000
+
+# Media type of Arrow IPC streams, served to clients that accept it
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+ARROW_TYPES = {str: pa.string(), int: pa.int64(), float: pa.float64(), datetime: pa.timestamp("us")}
+
+# Arrow IPC end-of-stream marker (continuation token, zero length)
+ARROW_STREAM_END = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+def _arrow_schema(row_type: type) -> pa.Schema:
+    """Build the Arrow schema of a row TypedDict (Optional fields are nullable anyway)"""
+    fields = []
+    for name, annotation in row_type.__annotations__.items():
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        fields.append(pa.field(name, ARROW_TYPES[args[0] if args else annotation]))
+    return pa.schema(fields)
+
+WEEKLY_ARROW_SCHEMA = _arrow_schema(PlayerStatsRow)
+
 class OptimizedPlayerService:
     def __init__(self):
         self.db = DatabaseManager()
         self.preloader = get_preloader()
+        self._encoded_rankings = lru_cache(maxsize=CACHE_CONFIG["query_cache_size"])(
+            self._encode_top_performers
+        )
+        self._encoded_weekly_pages = lru_cache(maxsize=CACHE_CONFIG["page_cache_size"])(
+            self._encode_weekly_stats
+        )
+        self._encoded_season_pages = lru_cache(maxsize=CACHE_CONFIG["page_cache_size"])(
+            self._encode_season_stats
+        )
+    
+    @property
+    def generation(self) -> int:
+        """Generation of the preloaded data, used to version HTTP responses"""
+        return self.preloader.generation
+    
+    def warm_weekly_pages(self):
+        """Encode the first weekly-stats page of every season and position into the page cache"""
+        if not self.preloader.is_loaded:
+            return
+        
+        seasons = self.preloader.preloaded_data.get('weekly_seasons', [])
+        for season in seasons:
+            for position in sorted(SKILL_POSITIONS):
+                self.get_weekly_stats_json(season, None, position, None, None, 1, HOT_PAGE_SIZE)
+        logger.info(f"Pre-encoded {len(seasons) * len(SKILL_POSITIONS)} hot weekly-stats pages")
+    
+    def get_weekly_stats_json(self, season: Optional[int], week: Optional[int],
+                              position: Optional[str], team: Optional[str],
+                              player_name: Optional[str], page: int, page_size: int) -> Optional[bytes]:
+        """Get a pre-serialized weekly-stats page, encoded once per data generation"""
+        if not self.preloader.is_loaded:
+            return None
+        return self._encoded_weekly_pages(self.generation, season, week, position, team,
+                                          player_name, page, page_size)
+    
+    def _encode_weekly_stats(self, generation: int, season: Optional[int], week: Optional[int],
+                             position: Optional[str], team: Optional[str],
+                             player_name: Optional[str], page: int, page_size: int) -> bytes:
+        """Serialize get_weekly_stats; generation only keys the cache"""
+        return orjson.dumps(
+            self.get_weekly_stats(season, week, position, team, player_name, page, page_size),
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
     
     def get_weekly_stats(self, 
                         season: Optional[int] = None,
@@ -25,22 +100,19 @@ class OptimizedPlayerService:
         
         # Use preloader for instant access
         if self.preloader.is_loaded:
-            data = self.preloader.get_weekly_stats(
+            rows = self.preloader.select_weekly_rows(
                 season=season,
                 week=week,
                 position=position,
+                team=team,
                 player_name=player_name
             )
             
-            # Apply team filter if specified
-            if team:
-                data = [record for record in data if record.get('team') == team]
-            
-            # Apply pagination
-            total_count = len(data)
+            # Apply pagination, materializing only the rows on this page
+            total_count = len(rows)
             start_idx = (page - 1) * page_size
             end_idx = start_idx + page_size
-            paginated_data = data[start_idx:end_idx]
+            paginated_data = self.preloader.get_weekly_rows(rows[start_idx:end_idx])
             
             return {
                 "success": True,
@@ -54,6 +126,68 @@ class OptimizedPlayerService:
         # Fallback to database if preloader not available
         return self._get_weekly_stats_from_db(season, week, position, team, player_name, page, page_size)
     
+    def iter_weekly_stats(self,
+                         season: Optional[int] = None,
+                         week: Optional[int] = None,
+                         position: Optional[str] = None,
+                         team: Optional[str] = None,
+                         player_name: Optional[str] = None) -> Iterator[PlayerStatsRow]:
+        """Iterate over every matching weekly record without paginating"""
+        if self.preloader.is_loaded:
+            rows = self.preloader.select_weekly_rows(
+                season=season,
+                week=week,
+                position=position,
+                team=team,
+                player_name=player_name
+            )
+            weekly_data = self.preloader.preloaded_data['weekly_stats_all']
+            for i in rows:
+                yield weekly_data[i]
+            return
+        
+        yield from self._iter_weekly_stats_from_db(season, week, position, team, player_name)
+    
+    def iter_weekly_stats_arrow(self,
+                                season: Optional[int] = None,
+                                week: Optional[int] = None,
+                                position: Optional[str] = None,
+                                team: Optional[str] = None,
+                                player_name: Optional[str] = None) -> Iterator[bytes]:
+        """Iterate over every matching weekly record as Arrow IPC stream messages
+        
+        Rows are converted to columnar record batches in C, one batch of
+        STREAM_PAGE_SIZE rows per message, so no per-row JSON is encoded.
+        """
+        yield WEEKLY_ARROW_SCHEMA.serialize().to_pybytes()
+        for batch in self._iter_weekly_batches(season, week, position, team, player_name):
+            yield batch.serialize().to_pybytes()
+        yield ARROW_STREAM_END
+    
+    def _iter_weekly_batches(self, season, week, position, team, player_name) -> Iterator[pa.RecordBatch]:
+        """Iterate over every matching weekly record in record batches of WEEKLY_ARROW_SCHEMA"""
+        if self.preloader.is_loaded:
+            rows = self.iter_weekly_stats(
+                season=season,
+                week=week,
+                position=position,
+                team=team,
+                player_name=player_name
+            )
+            while chunk := list(islice(rows, STREAM_PAGE_SIZE)):
+                yield pa.RecordBatch.from_pylist(chunk, schema=WEEKLY_ARROW_SCHEMA)
+            return
+        
+        # Without the preloader, DuckDB hands over Arrow batches directly
+        where_clause, params = self._weekly_where(season, week, position, team, player_name)
+        query = f"""
+        SELECT {", ".join(WEEKLY_ARROW_SCHEMA.names)} FROM weekly_stats
+        WHERE {where_clause}
+        ORDER BY COALESCE(fantasy_points, 0) DESC, id DESC
+        """
+        for batch in self.db.iter_arrow(query, params, STREAM_PAGE_SIZE):
+            yield batch.cast(WEEKLY_ARROW_SCHEMA)
+    
     def get_season_stats(self,
                         season: Optional[int] = None,
                         position: Optional[str] = None,
@@ -65,23 +199,18 @@ class OptimizedPlayerService:
         
         # Use preloader for instant access
         if self.preloader.is_loaded:
-            data = self.preloader.get_season_stats(
+            rows = self.preloader.select_season_rows(
                 season=season,
-                position=position
+                position=position,
+                team=team,
+                player_name=player_name
             )
             
-            # Apply additional filters
-            if team:
-                data = [record for record in data if record.get('team') == team]
-            
-            if player_name:
-                data = [record for record in data if player_name.lower() in record.get('player_name', '').lower()]
-            
-            # Apply pagination
-            total_count = len(data)
+            # Apply pagination, materializing only the rows on this page
+            total_count = len(rows)
             start_idx = (page - 1) * page_size
             end_idx = start_idx + page_size
-            paginated_data = data[start_idx:end_idx]
+            paginated_data = self.preloader.get_season_rows(rows[start_idx:end_idx])
             
             return {
                 "success": True,
@@ -95,6 +224,84 @@ class OptimizedPlayerService:
         # Fallback to database if preloader not available
         return self._get_season_stats_from_db(season, position, team, player_name, page, page_size)
     
+    def get_season_stats_json(self, season: Optional[int], position: Optional[str],
+                              team: Optional[str], player_name: Optional[str],
+                              page: int, page_size: int) -> Optional[bytes]:
+        """Get a pre-serialized season-stats page, encoded once per data generation"""
+        if not self.preloader.is_loaded:
+            return None
+        return self._encoded_season_pages(self.generation, season, position, team,
+                                          player_name, page, page_size)
+    
+    def _encode_season_stats(self, generation: int, season: Optional[int], position: Optional[str],
+                             team: Optional[str], player_name: Optional[str],
+                             page: int, page_size: int) -> bytes:
+        """Serialize get_season_stats; generation only keys the cache"""
+        return orjson.dumps(
+            self.get_season_stats(season, position, team, player_name, page, page_size),
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    
+    def get_season_stats_bulk(self, season: int, player_names: List[str]) -> Dict[str, SeasonStatsRow]:
+        """Get season stats for several players at once, keyed by lowercased name"""
+        
+        # Use preloader for a single batched lookup
+        if self.preloader.is_loaded:
+            return self.preloader.get_season_stats_for_players(season, player_names)
+        
+        # Fallback to database, one query per player
+        results = {}
+        for player_name in player_names:
+            player_result = self._get_season_stats_from_db(season, None, None, player_name, 1, 1)
+            if player_result["success"] and player_result["data"]:
+                results[player_name.lower()] = player_result["data"][0]
+        return results
+    
+    def get_stats_summary(self, season: int) -> Dict[str, Any]:
+        """Get per-position totals, averages and top performer for a season"""
+        summary = {}
+        
+        for position in ['QB', 'RB', 'WR', 'TE']:
+            columns = self._get_summary_columns(season, position)
+            if columns is None:
+                continue
+            
+            points = columns["fantasy_points"]
+            if not len(points):
+                continue
+            
+            total_fantasy_points = float(points.sum())
+            top_idx = int(points.argmax())
+            
+            summary[position] = {
+                "total_players": len(points),
+                "total_fantasy_points": round(total_fantasy_points, 1),
+                "avg_fantasy_points": round(float(points.mean()), 1),
+                "top_performer": {
+                    "name": columns["names"][top_idx],
+                    "team": columns["teams"][top_idx],
+                    "fantasy_points": float(points[top_idx])
+                }
+            }
+        
+        return {
+            "success": True,
+            "season": season,
+            "summary": summary,
+            "total_players": sum(pos_data["total_players"] for pos_data in summary.values())
+        }
+    
+    def _get_summary_columns(self, season: int, position: str) -> Optional[Dict[str, np.ndarray]]:
+        """Get summary columns from the preloader, or build them from the database"""
+        if self.preloader.is_loaded:
+            return self.preloader.get_season_columns(season, position)
+        
+        position_data = self._get_season_stats_from_db(season, position, None, None, 1, 1000)
+        if not position_data["success"]:
+            return None
+        
+        return self.preloader.build_summary_columns(position_data["data"])
+    
     def get_top_performers(self,
                           season: int,
                           position: Optional[str] = None,
@@ -104,11 +311,7 @@ class OptimizedPlayerService:
         
         # Use preloader for instant access
         if self.preloader.is_loaded:
-            data = self.preloader.get_top_performers(season, position, limit)
-            
-            # If requesting different stat type, sort by that stat
-            if stat_type != "fantasy_points" and stat_type in ['passing_yards', 'rushing_yards', 'receiving_yards', 'receptions']:
-                data = sorted(data, key=lambda x: x.get(stat_type, 0), reverse=True)[:limit]
+            data = self.preloader.get_top_performers(season, position, stat_type, limit)
             
             # Return only requested fields for performance
             result_data = [
@@ -131,6 +334,21 @@ class OptimizedPlayerService:
         # Fallback to database
         return self._get_top_performers_from_db(season, position, stat_type, limit)
     
+    def get_top_performers_json(self, season: int, position: Optional[str],
+                                stat_type: str, limit: int) -> Optional[bytes]:
+        """Get a pre-serialized top-performers response, encoded once per data generation"""
+        if not self.preloader.is_loaded:
+            return None
+        return self._encoded_rankings(self.generation, season, position, stat_type, limit)
+    
+    def _encode_top_performers(self, generation: int, season: int, position: Optional[str],
+                               stat_type: str, limit: int) -> bytes:
+        """Serialize get_top_performers; generation only keys the cache"""
+        return orjson.dumps(
+            self.get_top_performers(season, position, stat_type, limit),
+            option=orjson.OPT_SERIALIZE_NUMPY
+        )
+    
     def search_players(self, query: str, season: Optional[int] = None, limit: int = 20) -> Dict[str, Any]:
         """Search players with instant access from preloaded data"""
         
@@ -156,27 +374,8 @@ class OptimizedPlayerService:
         """Get trend data for specific players across weeks"""
         
         if self.preloader.is_loaded:
-            all_data = []
-            
-            for player_name in player_names:
-                player_data = self.preloader.get_weekly_stats(
-                    season=season,
-                    player_name=player_name
-                )
-                
-                # Filter by weeks if specified
-                if weeks:
-                    player_data = [record for record in player_data if record.get('week') in weeks]
-                
-                all_data.extend(player_data)
-            
-            # Group by player
-            trend_data = {}
-            for record in all_data:
-                player_name = record['player_name']
-                if player_name not in trend_data:
-                    trend_data[player_name] = []
-                trend_data[player_name].append(record)
+            # One scan of the season's rows for every requested player
+            trend_data = self.preloader.get_weekly_stats_by_player(season, player_names, weeks)
             
             return {
                 "success": True,
@@ -188,42 +387,63 @@ class OptimizedPlayerService:
         return self._get_trend_data_from_db(player_names, season, weeks)
     
     # Database fallback methods (for when preloader is not available)
+    @staticmethod
+    def _weekly_where(season, week, position, team, player_name):
+        """Build the WHERE clause and parameters of the weekly stats fallbacks"""
+        where_conditions = []
+        params = []
+        
+        if season:
+            where_conditions.append("season = ?")
+            params.append(season)
+        if week:
+            where_conditions.append("week = ?")
+            params.append(week)
+        if position:
+            where_conditions.append("position = ?")
+            params.append(position)
+        if team:
+            where_conditions.append("team = ?")
+            params.append(team)
+        if player_name:
+            where_conditions.append("player_name LIKE ?")
+            params.append(f"%{player_name}%")
+        
+        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+        return where_clause, params
+    
+    def _iter_weekly_stats_from_db(self, season, week, position, team, player_name):
+        """Database fallback for streaming weekly stats
+        
+        Pages are chained by keyset, each one resuming below the last
+        (fantasy_points, id) seen, so a page never re-sorts and skips the
+        rows before it the way a deep OFFSET does.
+        """
+        where_clause, params = self._weekly_where(season, week, position, team, player_name)
+        query = f"""
+        SELECT * FROM weekly_stats
+        WHERE {where_clause}{{keyset}}
+        ORDER BY COALESCE(fantasy_points, 0) DESC, id DESC
+        LIMIT ?
+        """
+        keyset, keyset_params = "", []
+        
+        while True:
+            data = self.db.execute_query(query.format(keyset=keyset),
+                                         params + keyset_params + [STREAM_PAGE_SIZE])
+            yield from data
+            if len(data) < STREAM_PAGE_SIZE:
+                return
+            last = data[-1]
+            keyset = " AND (COALESCE(fantasy_points, 0), id) < (?, ?)"
+            keyset_params = [last['fantasy_points'] or 0, last['id']]
+    
     def _get_weekly_stats_from_db(self, season, week, position, team, player_name, page, page_size):
         """Database fallback for weekly stats"""
         try:
-            where_conditions = []
-            params = []
+            where_clause, params = self._weekly_where(season, week, position, team, player_name)
             
-            if season:
-                where_conditions.append("season = ?")
-                params.append(season)
-            if week:
-                where_conditions.append("week = ?")
-                params.append(week)
-            if position:
-                where_conditions.append("position = ?")
-                params.append(position)
-            if team:
-                where_conditions.append("team = ?")
-                params.append(team)
-            if player_name:
-                where_conditions.append("player_name LIKE ?")
-                params.append(f"%{player_name}%")
-            
-            where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-            
-            count_query = f"SELECT COUNT(*) as total FROM weekly_stats WHERE {where_clause}"
-            total_count = self.db.execute_query(count_query, params)[0]['total']
-            
-            offset = (page - 1) * page_size
-            data_query = f"""
-            SELECT * FROM weekly_stats 
-            WHERE {where_clause}
-            ORDER BY fantasy_points DESC
-            LIMIT ? OFFSET ?
-            """
-            
-            data = self.db.execute_query(data_query, params + [page_size, offset])
+            data, total_count = self.db.fetch_page("weekly_stats", where_clause, params, page, page_size)
             
             return {
                 "success": True,
@@ -258,18 +478,7 @@ class OptimizedPlayerService:
             
             where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
             
-            count_query = f"SELECT COUNT(*) as total FROM season_stats WHERE {where_clause}"
-            total_count = self.db.execute_query(count_query, params)[0]['total']
-            
-            offset = (page - 1) * page_size
-            data_query = f"""
-            SELECT * FROM season_stats 
-            WHERE {where_clause}
-            ORDER BY fantasy_points DESC
-            LIMIT ? OFFSET ?
-            """
-            
-            data = self.db.execute_query(data_query, params + [page_size, offset])
+            data, total_count = self.db.fetch_page("season_stats", where_clause, params, page, page_size)
             
             return {
                 "success": True,
@@ -295,8 +504,7 @@ class OptimizedPlayerService:
             
             where_clause = " AND ".join(where_conditions)
             
-            valid_stats = ['fantasy_points', 'passing_yards', 'rushing_yards', 'receiving_yards', 'receptions']
-            if stat_type not in valid_stats:
+            if stat_type not in TOP_PERFORMER_STATS:
                 stat_type = 'fantasy_points'
             
             query = f"""
@@ -392,12 +600,7 @@ class OptimizedPlayerService:
             logger.error(f"Database fallback error: {e}")
             return {"success": False, "data": {}, "total_players": 0}
 
-# Global optimized service instance
-_optimized_player_service = None
-
+@lru_cache(maxsize=1)
 def get_optimized_player_service() -> OptimizedPlayerService:
-    """Get the global optimized player service instance"""
-    global _optimized_player_service
-    if _optimized_player_service is None:
-        _optimized_player_service = OptimizedPlayerService()
-    return _optimized_player_service
\ No newline at end of file
+    """Get the global optimized player service instance (created on first use)"""
+    return OptimizedPlayerService()
@@ -3,6 +3,7 @@ Player data service with caching and optimized queries
 """
 import logging
 from typing import List, Dict, Any, Optional
+from app.config.settings import TOP_PERFORMER_STATS
 from app.utils.database import get_db
 from app.utils.cache import cached, cache_key_for_player_stats, cache_key_for_season_stats, CACHE_CONFIG
 from app.models.player import PlayerStats, SeasonStats, PlayerStatsResponse
@@ -58,22 +59,9 @@ class PlayerService:
             
             where_clause = " AND ".join(where_conditions)
             
-            # Get total count
-            count_query = f"SELECT COUNT(*) as total FROM weekly_stats WHERE {where_clause}"
-            count_result = self.db.execute_query(count_query, params)
-            total_count = count_result[0]['total'] if count_result else 0
-            
-            # Get paginated data
-            offset = (page - 1) * page_size
-            data_query = f"""
-                SELECT * FROM weekly_stats 
-                WHERE {where_clause}
-                ORDER BY fantasy_points DESC, player_name
-                LIMIT ? OFFSET ?
-            """
-            params.extend([page_size, offset])
-            
-            results = self.db.execute_query(data_query, params)
+            # Get paginated data and the total count in one query
+            results, total_count = self.db.fetch_page("weekly_stats", where_clause, params, page, page_size,
+                                                      order_by="fantasy_points DESC, player_name")
             
             # Convert to PlayerStats objects
             player_stats = [PlayerStats(**row) for row in results]
@@ -133,22 +121,9 @@ class PlayerService:
             
             where_clause = " AND ".join(where_conditions)
             
-            # Get total count
-            count_query = f"SELECT COUNT(*) as total FROM season_stats WHERE {where_clause}"
-            count_result = self.db.execute_query(count_query, params)
-            total_count = count_result[0]['total'] if count_result else 0
-            
-            # Get paginated data
-            offset = (page - 1) * page_size
-            data_query = f"""
-                SELECT * FROM season_stats 
-                WHERE {where_clause}
-                ORDER BY fantasy_points DESC, player_name
-                LIMIT ? OFFSET ?
-            """
-            params.extend([page_size, offset])
-            
-            results = self.db.execute_query(data_query, params)
+            # Get paginated data and the total count in one query
+            results, total_count = self.db.fetch_page("season_stats", where_clause, params, page, page_size,
+                                                      order_by="fantasy_points DESC, player_name")
             
             # Convert to SeasonStats objects
             season_stats = [SeasonStats(**row) for row in results]
@@ -246,12 +221,7 @@ class PlayerService:
         """
         try:
             # Validate stat_type
-            valid_stats = [
-                'fantasy_points', 'passing_yards', 'rushing_yards', 'receiving_yards',
-                'receptions', 'passing_tds', 'rushing_tds', 'receiving_tds'
-            ]
-            
-            if stat_type not in valid_stats:
+            if stat_type not in TOP_PERFORMER_STATS:
                 stat_type = 'fantasy_points'
             
             # Choose table based on whether week is specified
@@ -2,107 +2,214 @@
 In-memory caching utilities for improved performance
 """
 import time
+import inspect
 import logging
-from typing import Any, Optional, Dict, Callable
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Optional, Dict, List, Set, Tuple, Callable, Iterable
 from functools import wraps
 from app.config.settings import CACHE_CONFIG
 
 logger = logging.getLogger(__name__)
 
 class SimpleCache:
-    """Simple in-memory cache with TTL support"""
+    """
+    Simple in-memory LRU cache with TTL support
+    
+    Entries are spread over independently locked shards so concurrent
+    readers of different keys never wait on a single global lock. Each
+    shard keeps its entries in recency order, least recently used first.
+    Entries may carry tags, so related keys can be dropped together without
+    scanning the cache.
+    """
     
     def __init__(self, default_ttl: int = CACHE_CONFIG["default_ttl"], 
-                 max_size: int = CACHE_CONFIG["max_size"]):
+                 max_size: int = CACHE_CONFIG["max_size"],
+                 shards: int = CACHE_CONFIG["shards"]):
         self.default_ttl = default_ttl
         self.max_size = max_size
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._shards: List[OrderedDict[str, Tuple[Any, float, Tuple[str, ...]]]] = [
+            OrderedDict() for _ in range(shards)
+        ]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._shard_size = max(1, max_size // shards)
+        # Keys by tag; always taken after a shard lock, never before one
+        self._tags: Dict[str, Set[str]] = defaultdict(set)
+        self._tags_lock = threading.Lock()
+    
+    def _shard_for(self, key: str) -> Tuple[OrderedDict[str, Tuple[Any, float, Tuple[str, ...]]], threading.Lock]:
+        """Get the shard and lock responsible for a key"""
+        index = hash(key) % len(self._shards)
+        return self._shards[index], self._locks[index]
     
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
-        if key not in self._cache:
-            return None
-        
-        entry = self._cache[key]
-        
-        # Check if expired
-        if time.time() > entry['expires_at']:
-            del self._cache[key]
-            return None
-        
-        entry['last_accessed'] = time.time()
-        return entry['value']
+        shard, lock = self._shard_for(key)
+        with lock:
+            try:
+                value, expires_at, tags = shard[key]
+            except KeyError:
+                return None
+            
+            # Check if expired
+            if time.time() > expires_at:
+                del shard[key]
+                self._untag(key, tags)
+                return None
+            
+            shard.move_to_end(key)
+            return value
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Set value in cache"""
+    def set(self, key: str, value: Any, ttl: Optional[int] = None,
+            tags: Iterable[str] = ()) -> None:
+        """Set value in cache, optionally under tags for invalidate_tag"""
         if ttl is None:
             ttl = self.default_ttl
         
-        # Evict oldest entries if cache is full
-        if len(self._cache) >= self.max_size:
-            self._evict_oldest()
-        
-        self._cache[key] = {
-            'value': value,
-            'expires_at': time.time() + ttl,
-            'last_accessed': time.time(),
-            'created_at': time.time()
-        }
+        tags = tuple(tags)
+        shard, lock = self._shard_for(key)
+        expires_at = time.time() + ttl
+        with lock:
+            previous = shard.pop(key, None)
+            if previous is not None:
+                self._untag(key, previous[2])
+            else:
+                # Evict the least recently used entries if this shard is full
+                while len(shard) >= self._shard_size:
+                    evicted_key, (_, _, evicted_tags) = shard.popitem(last=False)
+                    self._untag(evicted_key, evicted_tags)
+            shard[key] = (value, expires_at, tags)
+            if tags:
+                with self._tags_lock:
+                    for tag in tags:
+                        self._tags[tag].add(key)
+    
+    def get_or_set(self, key: str, loader: Callable[[], Any],
+                   ttl: Optional[int] = None, tags: Iterable[str] = ()) -> Any:
+        """Get value from cache, computing and storing it with loader on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.set(key, value, ttl, tags)
+        return value
     
     def delete(self, key: str) -> bool:
         """Delete key from cache"""
-        if key in self._cache:
-            del self._cache[key]
+        shard, lock = self._shard_for(key)
+        with lock:
+            entry = shard.pop(key, None)
+            if entry is None:
+                return False
+            self._untag(key, entry[2])
             return True
-        return False
     
-    def clear(self) -> None:
-        """Clear all cache entries"""
-        self._cache.clear()
+    def invalidate_tag(self, tag: str) -> int:
+        """Delete every key stored under tag, returning how many were removed"""
+        with self._tags_lock:
+            keys = self._tags.pop(tag, ())
+        return sum(self.delete(key) for key in keys)
     
-    def _evict_oldest(self) -> None:
-        """Evict oldest entries to make room"""
-        if not self._cache:
+    def _untag(self, key: str, tags: Tuple[str, ...]) -> None:
+        """Drop a removed key from its tags' key sets (caller holds its shard lock)"""
+        if not tags:
             return
-        
-        # Remove 10% of oldest entries
-        entries_to_remove = max(1, len(self._cache) // 10)
-        
-        # Sort by last accessed time
-        sorted_entries = sorted(
-            self._cache.items(),
-            key=lambda x: x[1]['last_accessed']
-        )
-        
-        for i in range(entries_to_remove):
-            key = sorted_entries[i][0]
-            del self._cache[key]
+        with self._tags_lock:
+            for tag in tags:
+                keys = self._tags.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tags[tag]
+    
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Delete every key starting with prefix, returning how many were removed"""
+        removed = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                stale_keys = [key for key in shard if key.startswith(prefix)]
+                for key in stale_keys:
+                    self._untag(key, shard.pop(key)[2])
+                removed += len(stale_keys)
+        return removed
+    
+    def clear(self) -> None:
+        """Clear all cache entries"""
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
+        with self._tags_lock:
+            self._tags.clear()
     
     def stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         now = time.time()
-        expired_count = sum(
-            1 for entry in self._cache.values()
-            if now > entry['expires_at']
-        )
+        total_entries = 0
+        expired_count = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                total_entries += len(shard)
+                expired_count += sum(
+                    1 for _, expires_at, _ in shard.values()
+                    if now > expires_at
+                )
         
         return {
-            'total_entries': len(self._cache),
+            'total_entries': total_entries,
             'expired_entries': expired_count,
             'max_size': self.max_size,
-            'default_ttl': self.default_ttl
+            'default_ttl': self.default_ttl,
+            'shards': len(self._shards)
         }
 
 # Global cache instance
 cache = SimpleCache()
 
+# Tag carried by every cached data-status summary
+DATA_STATUS_TAG = "data"
+
+# Tag carried by every @cached result
+PLAYERS_TAG = "players"
+
+def season_cache_prefix(season: Optional[int]) -> str:
+    """Get the key prefix shared by all cached player data for a season"""
+    return f"players:{season if season is not None else 'all'}:"
+
+def season_cache_tag(season: Optional[int]) -> str:
+    """Get the tag shared by all cached player data for a season"""
+    return f"season:{season if season is not None else 'all'}"
+
 def cached(ttl: Optional[int] = None, key_prefix: str = ""):
-    """Decorator for caching function results"""
+    """
+    Decorator for caching function results
+    
+    Functions taking a ``season`` argument are cached under that season's
+    prefix and tag so a refresh of one season leaves the others warm.
+    """
     def decorator(func: Callable) -> Callable:
+        parameters = inspect.signature(func).parameters
+        name_prefix = f"{key_prefix}{func.__name__}:"
+        
+        # Locate the season argument once rather than binding every call
+        season_index = list(parameters).index("season") if "season" in parameters else None
+        season_default = None
+        if season_index is not None and parameters["season"].default is not inspect.Parameter.empty:
+            season_default = parameters["season"].default
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Generate cache key
-            cache_key = f"{key_prefix}{func.__name__}:{hash(str(args) + str(sorted(kwargs.items())))}"
+            scope = ""
+            tags = (PLAYERS_TAG,)
+            if season_index is not None:
+                season = args[season_index] if len(args) > season_index else kwargs.get("season", season_default)
+                scope = season_cache_prefix(season)
+                tags += (season_cache_tag(season),)
+            try:
+                args_hash = hash((args, frozenset(kwargs.items())) if kwargs else args)
+            except TypeError:
+                # Unhashable arguments such as lists fall back to their repr
+                args_hash = hash(str(args) + str(sorted(kwargs.items())))
+            cache_key = f"{scope}{name_prefix}{args_hash}"
             
             # Try to get from cache
             result = cache.get(cache_key)
@@ -113,7 +220,7 @@ def cached(ttl: Optional[int] = None, key_prefix: str = ""):
             # Execute function and cache result
             logger.debug(f"Cache miss for {cache_key}")
             result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
+            cache.set(cache_key, result, ttl, tags)
             
             return result
         return wrapper
@@ -123,7 +230,7 @@ def cache_key_for_player_stats(season: int, week: Optional[int] = None,
                               position: Optional[str] = None, 
                               team: Optional[str] = None) -> str:
     """Generate cache key for player stats queries"""
-    key_parts = [f"player_stats:season_{season}"]
+    key_parts = [f"{season_cache_prefix(season)}player_stats"]
     
     if week is not None:
         key_parts.append(f"week_{week}")
@@ -136,18 +243,30 @@ def cache_key_for_player_stats(season: int, week: Optional[int] = None,
 
 def cache_key_for_season_stats(season: int, position: Optional[str] = None) -> str:
     """Generate cache key for season stats queries"""
-    key_parts = [f"season_stats:season_{season}"]
+    key_parts = [f"{season_cache_prefix(season)}season_stats"]
     
     if position:
         key_parts.append(f"pos_{position}")
     
     return ":".join(key_parts)
 
+def invalidate_season_cache(season: int) -> int:
+    """Invalidate cache entries that may include data for a season"""
+    removed = cache.invalidate_tag(season_cache_tag(season))
+    # Cross-season player entries and data status summaries cover every season
+    removed += cache.invalidate_tag(season_cache_tag(None))
+    removed += cache.invalidate_tag(DATA_STATUS_TAG)
+    logger.info(f"Invalidated {removed} cache entries for season {season}")
+    return removed
+
 def invalidate_player_cache(player_id: str, season: int):
     """Invalidate cache entries for a specific player and season"""
-    # This is a simple implementation - in production you might want
-    # more sophisticated cache invalidation
-    cache.clear()  # For now, clear all cache
+    if season:
+        invalidate_season_cache(season)
+    else:
+        # Any season may hold the player; other cached data stays warm
+        cache.invalidate_tag(PLAYERS_TAG)
+        cache.invalidate_tag(DATA_STATUS_TAG)
     logger.info(f"Invalidated cache for player {player_id}, season {season}")
 
 def get_cache() -> SimpleCache:
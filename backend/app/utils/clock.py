@@ -0,0 +1,18 @@
+"""
+Coarse wall clock for response timestamps
+"""
+import time
+from datetime import datetime, timezone
+
+_now = datetime.now(timezone.utc).replace(microsecond=0)
+_refresh_at = 0.0
+
+def current_utc() -> datetime:
+    """Get the current UTC time at one-second resolution, rebuilt at most once a second"""
+    global _now, _refresh_at
+    
+    monotonic_now = time.monotonic()
+    if monotonic_now >= _refresh_at:
+        _now = datetime.now(timezone.utc).replace(microsecond=0)
+        _refresh_at = monotonic_now + 1
+    return _now
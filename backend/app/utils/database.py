@@ -1,29 +1,85 @@
 """
 Database utilities and connection management
 """
+import asyncio
 import duckdb
 import logging
-from typing import Optional, List, Dict, Any
+import threading
+import pyarrow as pa
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
 from contextlib import contextmanager
+from itertools import chain, count, islice
 from pathlib import Path
-from app.config.settings import DATABASE_CONFIG
+from types import MappingProxyType
+from app.config.settings import DATABASE_CONFIG, CACHE_CONFIG
+from app.utils.cache import SimpleCache
 
 logger = logging.getLogger(__name__)
 
+# Name under which execute_batch_insert exposes each batch to DuckDB
+BATCH_VIEW = "_batch_insert"
+
+# Results of execute_query(..., cache=True), shared by every DatabaseManager in
+# the process so a write through any of them (e.g. the ETL's) invalidates them
+_query_results = SimpleCache(default_ttl=CACHE_CONFIG["db_result_ttl"],
+                             max_size=CACHE_CONFIG["db_result_cache_size"])
+
+# Secondary indexes by name: (table, indexed columns)
+INDEXES = {
+    "idx_weekly_stats_season_week": ("weekly_stats", "season, week"),
+    "idx_weekly_stats_player": ("weekly_stats", "player_id"),
+    "idx_weekly_stats_position": ("weekly_stats", "position"),
+    "idx_weekly_stats_team": ("weekly_stats", "team"),
+    "idx_season_stats_season": ("season_stats", "season"),
+    "idx_season_stats_player": ("season_stats", "player_id"),
+    "idx_season_stats_position": ("season_stats", "position"),
+    "idx_snap_counts_season_week": ("snap_counts", "season, week"),
+    "idx_draftkings_season_week": ("draftkings_pricing", "season, week"),
+}
+
 class DatabaseManager:
-    """Manages DuckDB connections and operations"""
+    """Manages DuckDB connections and operations
+    
+    One root connection owns the database; every thread works on its own
+    cursor of it, since a DuckDB connection must not be used from several
+    threads at once and a shared one would serialize their queries.
+    """
     
     def __init__(self, db_path: Optional[Path] = None):
         self.db_path = db_path or DATABASE_CONFIG["path"]
-        self._connection = None
+        self._root = None
+        self._initialized = False
+        # Reentrant: schema setup runs through self.connection while holding it
+        self._root_lock = threading.RLock()
+        self._local = threading.local()
+        self._cursors: List[duckdb.DuckDBPyConnection] = []
+    
+    @property
+    def _root_connection(self) -> duckdb.DuckDBPyConnection:
+        """Get or create the root connection, initializing the schema once"""
+        if not self._initialized:
+            with self._root_lock:
+                if self._root is None:
+                    self._root = duckdb.connect(str(self.db_path))
+                    self._initialize_database()
+                    self._initialized = True
+        return self._root
     
     @property
     def connection(self) -> duckdb.DuckDBPyConnection:
-        """Get or create database connection"""
-        if self._connection is None:
-            self._connection = duckdb.connect(str(self.db_path))
-            self._initialize_database()
-        return self._connection
+        """Get the calling thread's cursor, creating it on first use"""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            root = self._root_connection
+            # Schema setup on first connect may already have made this thread's cursor
+            cursor = getattr(self._local, "cursor", None)
+            if cursor is not None:
+                return cursor
+            cursor = root.cursor()
+            self._local.cursor = cursor
+            with self._root_lock:
+                self._cursors.append(cursor)
+        return cursor
     
     def _initialize_database(self):
         """Initialize database schema and indexes"""
@@ -150,82 +206,291 @@ class DatabaseManager:
             )
         """)
     
-    def _create_indexes(self):
-        """Create database indexes for performance"""
-        indexes = [
-            "CREATE INDEX IF NOT EXISTS idx_weekly_stats_season_week ON weekly_stats(season, week)",
-            "CREATE INDEX IF NOT EXISTS idx_weekly_stats_player ON weekly_stats(player_id)",
-            "CREATE INDEX IF NOT EXISTS idx_weekly_stats_position ON weekly_stats(position)",
-            "CREATE INDEX IF NOT EXISTS idx_weekly_stats_team ON weekly_stats(team)",
-            "CREATE INDEX IF NOT EXISTS idx_season_stats_season ON season_stats(season)",
-            "CREATE INDEX IF NOT EXISTS idx_season_stats_player ON season_stats(player_id)",
-            "CREATE INDEX IF NOT EXISTS idx_season_stats_position ON season_stats(position)",
-            "CREATE INDEX IF NOT EXISTS idx_snap_counts_season_week ON snap_counts(season, week)",
-            "CREATE INDEX IF NOT EXISTS idx_draftkings_season_week ON draftkings_pricing(season, week)",
-        ]
-        
-        for index_sql in indexes:
+    def _create_indexes(self, names: Optional[List[str]] = None, raise_errors: bool = False):
+        """Create database indexes for performance (all of them, or just the named ones)
+        
+        Failures are logged and skipped unless raise_errors is set.
+        """
+        for name in names or INDEXES:
+            table, columns = INDEXES[name]
             try:
-                self.connection.execute(index_sql)
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})")
             except Exception as e:
+                if raise_errors:
+                    logger.error(f"Index creation failed: {e}")
+                    raise
                 logger.warning(f"Index creation failed: {e}")
     
+    @contextmanager
+    def deferred_indexes(self, table: str, names: Optional[List[str]] = None):
+        """Context manager dropping a table's secondary indexes for a bulk write
+        
+        The indexes (all of the table's, or just the named ones) are rebuilt once
+        on exit instead of being maintained row by row. Use inside a transaction
+        so a failed write, or a failed rebuild (which is raised), rolls the drop back.
+        """
+        if names is None:
+            names = [name for name, (index_table, _) in INDEXES.items() if index_table == table]
+        for name in names:
+            self.connection.execute(f"DROP INDEX IF EXISTS {name}")
+        try:
+            yield self.connection
+        except Exception:
+            # Outside a transaction nothing restores the drop, so rebuild before re-raising
+            self._create_indexes(names)
+            raise
+        self._create_indexes(names, raise_errors=True)
+    
     @contextmanager
     def transaction(self):
-        """Context manager for database transactions"""
+        """Context manager for database transactions
+        
+        Nested use joins the enclosing transaction, which alone commits or
+        rolls back, so helpers can be called with or without one open.
+        """
+        # Transactions belong to the thread's cursor, so their depth is per thread too
+        depth = getattr(self._local, "transaction_depth", 0)
+        if depth:
+            self._local.transaction_depth = depth + 1
+            try:
+                yield self.connection
+            finally:
+                self._local.transaction_depth -= 1
+            return
+        
         try:
             self.connection.execute("BEGIN TRANSACTION")
+            self._local.transaction_depth = 1
             yield self.connection
             self.connection.execute("COMMIT")
+            self.invalidate_results()
         except Exception as e:
             self.connection.execute("ROLLBACK")
             logger.error(f"Transaction rolled back: {e}")
             raise
+        finally:
+            self._local.transaction_depth = 0
     
-    def execute_query(self, query: str, params: Optional[List] = None) -> List[Dict[str, Any]]:
-        """Execute a query and return results as list of dictionaries"""
+    @contextmanager
+    def bulk_load(self):
+        """Context manager relaxing write settings for a bulk load, checkpointing once at the end
+        
+        The checkpoint only runs after a successful load. Cleanup errors are
+        logged rather than raised, so they never replace the load's own error.
+        """
+        settings = DATABASE_CONFIG["bulk_load_settings"]
+        for name, value in settings.items():
+            self.connection.execute(f"SET {name} = {value}")
+        succeeded = False
+        try:
+            yield self.connection
+            succeeded = True
+        finally:
+            for name in settings:
+                try:
+                    self.connection.execute(f"RESET {name}")
+                except Exception as e:
+                    logger.error(f"Failed to reset {name} after bulk load: {e}")
+            if succeeded:
+                try:
+                    self.connection.execute("CHECKPOINT")
+                except Exception as e:
+                    logger.error(f"Checkpoint after bulk load failed: {e}")
+            self.invalidate_results()
+    
+    def execute_query(self, query: str, params: Optional[List] = None,
+                      cache: bool = False) -> List[Dict[str, Any]]:
+        """Execute a query and return results as list of dictionaries
+        
+        With cache=True (meant for small, repeated metadata reads) the rows are
+        reused for up to db_result_ttl seconds, keyed by database, SQL and
+        params, and are returned as read-only mappings. Transactions, bulk
+        loads and batch inserts through any manager drop them earlier; other
+        writes are only bounded by the TTL. Reads inside a transaction are
+        never cached.
+        """
+        cache = cache and not getattr(self._local, "transaction_depth", 0)
+        if cache:
+            key = (str(self.db_path), query, repr(params))
+            results = _query_results.get(key)
+            if results is not None:
+                return list(results)
+        
+        try:
+            results = self._fetch_dicts(self.connection, query, params)
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            raise
+        
+        if cache:
+            results = [MappingProxyType(row) for row in results]
+            _query_results.set(key, tuple(results))
+        return results
+    
+    def invalidate_results(self) -> None:
+        """Drop every cached query result, e.g. after writing outside a manager"""
+        _query_results.clear()
+    
+    def fetch_page(self, table: str, where_clause: str, params: List, page: int, page_size: int,
+                   order_by: str = "fantasy_points DESC") -> Tuple[List[Dict[str, Any]], int]:
+        """Fetch one page of a table with the total match count
+        
+        The count rides along as a window aggregate, so a page costs one
+        query; only a page past the end needs a separate count.
+        """
+        offset = (page - 1) * page_size
+        data_query = f"""
+            SELECT *, COUNT(*) OVER () AS _total_count FROM {table}
+            WHERE {where_clause}
+            ORDER BY {order_by}
+            LIMIT ? OFFSET ?
+        """
+        rows = self.execute_query(data_query, params + [page_size, offset])
+        
+        if not rows:
+            count_query = f"SELECT COUNT(*) as total FROM {table} WHERE {where_clause}"
+            return rows, self.execute_query(count_query, params)[0]['total']
+        
+        total_count = rows[0]['_total_count']
+        for row in rows:
+            del row['_total_count']
+        return rows, total_count
+    
+    async def execute_query_async(self, query: str, params: Optional[List] = None) -> List[Dict[str, Any]]:
+        """Execute a read query on a worker thread without blocking the event loop
+        
+        DuckDB connections must not be shared across threads, so each call
+        runs on its own cursor (a child connection to the same database).
+        """
+        cursor = self._root_connection.cursor()
+        try:
+            return await asyncio.to_thread(self._fetch_dicts, cursor, query, params)
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            raise
+        finally:
+            cursor.close()
+    
+    def iter_query(self, query: str, params: Optional[List] = None,
+                   chunk_size: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+        """Execute a read query and yield results in chunks of dictionaries
+        
+        Only one chunk of raw rows is held at a time, so callers can index
+        rows as they come off the cursor. Runs on its own cursor, so it is
+        safe to consume from a worker thread.
+        """
+        cursor = self._root_connection.cursor()
         try:
             if params:
-                result = self.connection.execute(query, params).fetchall()
+                cursor.execute(query, params)
             else:
-                result = self.connection.execute(query).fetchall()
+                cursor.execute(query)
             
-            # Get column names
-            columns = [desc[0] for desc in self.connection.description]
+            columns = [desc[0] for desc in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [dict(zip(columns, row)) for row in rows]
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            raise
+        finally:
+            cursor.close()
+    
+    def iter_arrow(self, query: str, params: Optional[List] = None,
+                   batch_size: int = 10000) -> Iterator[pa.RecordBatch]:
+        """Execute a read query and yield results as Arrow record batches
+        
+        Rows go from DuckDB's vectors to Arrow columns without becoming
+        Python objects. Runs on its own cursor, like iter_query.
+        """
+        cursor = self._root_connection.cursor()
+        try:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
             
-            # Convert to list of dictionaries
-            return [dict(zip(columns, row)) for row in result]
+            yield from cursor.fetch_record_batch(batch_size)
         except Exception as e:
             logger.error(f"Query execution failed: {e}")
             raise
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _fetch_dicts(connection: duckdb.DuckDBPyConnection, query: str,
+                     params: Optional[List] = None) -> List[Dict[str, Any]]:
+        """Run a query on the given connection and convert rows to dictionaries"""
+        if params:
+            result = connection.execute(query, params).fetchall()
+        else:
+            result = connection.execute(query).fetchall()
+        
+        # Get column names
+        columns = [desc[0] for desc in connection.description]
+        
+        # Convert to list of dictionaries
+        return [dict(zip(columns, row)) for row in result]
     
-    def execute_batch_insert(self, table: str, data: List[Dict[str, Any]], 
-                           batch_size: int = 1000) -> int:
-        """Execute batch insert for better performance"""
-        if not data:
+    def execute_batch_insert(self, table: str, data: Iterable[Dict[str, Any]], 
+                           batch_size: int = 1000, conflict_key: Optional[str] = None,
+                           update_columns: Optional[List[str]] = None) -> int:
+        """Execute batch insert for better performance
+        
+        data may be any iterable of records, such as a generator; rows are
+        pulled one batch at a time, so only a batch is held in memory here.
+        Each batch is converted to an Arrow table and inserted with a single
+        columnar INSERT ... SELECT instead of binding every row.
+        
+        With a conflict_key, rows whose key already exists are updated in place
+        (only update_columns, or every other column when not given) instead of
+        failing, so a reload needs no preceding DELETE. DuckDB cannot update
+        indexed columns, so pass update_columns for tables with indexes.
+        """
+        records = iter(data)
+        first_record = next(records, None)
+        if first_record is None:
             return 0
         
         total_inserted = 0
         
         try:
             # Get column names from first record
-            columns = list(data[0].keys())
-            placeholders = ', '.join(['?' for _ in columns])
+            columns = list(first_record.keys())
             column_names = ', '.join(columns)
             
-            # Use simple INSERT for DuckDB
-            insert_sql = f"INSERT INTO {table} ({column_names}) VALUES ({placeholders})"
+            # Built once and run against each registered batch
+            insert_sql = f"INSERT INTO {table} ({column_names}) SELECT {column_names} FROM {BATCH_VIEW}"
+            if conflict_key:
+                if update_columns is None:
+                    update_columns = [column for column in columns if column != conflict_key]
+                assignments = ', '.join(f"{column} = excluded.{column}" for column in update_columns)
+                insert_sql += f" ON CONFLICT ({conflict_key}) DO UPDATE SET {assignments}"
             
             # Process in batches
-            for i in range(0, len(data), batch_size):
-                batch = data[i:i + batch_size]
-                batch_values = [[record[col] for col in columns] for record in batch]
-                
-                self.connection.executemany(insert_sql, batch_values)
+            records = chain([first_record], records)
+            for batch_number in count():
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
                 total_inserted += len(batch)
                 
-                if i % (batch_size * 10) == 0:  # Log progress every 10 batches
-                    logger.info(f"Inserted {total_inserted}/{len(data)} records into {table}")
+                if conflict_key:
+                    # One statement cannot update a row twice; the last record
+                    # for a key wins, as it did when rows were upserted one by one
+                    batch = list({record[conflict_key]: record for record in batch}.values())
+                
+                self.connection.register(BATCH_VIEW, pa.Table.from_pylist(batch))
+                try:
+                    self.connection.execute(insert_sql)
+                finally:
+                    self.connection.unregister(BATCH_VIEW)
+                    self.invalidate_results()
+                
+                if batch_number % 10 == 0:  # Log progress every 10 batches
+                    logger.info(f"Inserted {total_inserted} records into {table}")
         
             logger.info(f"Successfully inserted {total_inserted} records into {table}")
             return total_inserted
@@ -234,11 +499,40 @@ class DatabaseManager:
             logger.error(f"Batch insert failed for {table}: {e}")
             raise
     
+    def delete_missing(self, table: str, key: str, keys: pa.Array,
+                       where: str, params: Optional[List] = None) -> int:
+        """Delete the rows matching where whose key is not among keys
+        
+        Run before upserting a reload, so rows that disappeared upstream do not
+        linger and cannot collide with their replacements on other unique columns.
+        """
+        self.connection.register(BATCH_VIEW, pa.table({key: keys}))
+        try:
+            deleted = self.connection.execute(f"""
+                DELETE FROM {table}
+                WHERE {where}
+                  AND {key} NOT IN (SELECT {key} FROM {BATCH_VIEW})
+            """, params or []).fetchone()[0]
+        finally:
+            self.connection.unregister(BATCH_VIEW)
+            self.invalidate_results()
+        
+        if deleted:
+            logger.info(f"Removed {deleted} records no longer in the load from {table}")
+        return deleted
+    
     def close(self):
-        """Close database connection"""
-        if self._connection:
-            self._connection.close()
-            self._connection = None
+        """Close every thread's cursor and the root connection"""
+        with self._root_lock:
+            for cursor in self._cursors:
+                cursor.close()
+            self._cursors.clear()
+            # Fresh thread-local state, so no thread keeps a closed cursor
+            self._local = threading.local()
+            if self._root is not None:
+                self._root.close()
+                self._root = None
+            self._initialized = False
 
 # Global database manager instance
 db_manager = DatabaseManager()
@@ -1,9 +1,15 @@
 """
 Fantasy points calculation utilities
 """
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
+import numpy as np
+import polars as pl
 from app.config.settings import DRAFTKINGS_SCORING
 
+# Scoring stats and their weights as a vector, for scoring many rows at once
+SCORED_STATS = tuple(DRAFTKINGS_SCORING)
+SCORING_WEIGHTS = np.array([DRAFTKINGS_SCORING[stat] for stat in SCORED_STATS], dtype=np.float64)
+
 def calculate_fantasy_points(stats: Dict[str, Any]) -> float:
     """
     Calculate DraftKings PPR fantasy points from player stats
@@ -36,6 +42,40 @@ def calculate_fantasy_points(stats: Dict[str, Any]) -> float:
     
     return round(points, 2)
 
+def fantasy_points_expr(columns: Iterable[str]) -> pl.Expr:
+    """
+    Build a Polars expression computing DraftKings PPR fantasy points for a whole frame
+    
+    Args:
+        columns: Stat columns present in the frame; scoring stats not listed count as 0
+        
+    Returns:
+        pl.Expr: Rounded fantasy points, the column-wise equivalent of calculate_fantasy_points
+    """
+    columns = set(columns)
+    scored = [pl.col(stat).fill_null(0) * weight
+              for stat, weight in DRAFTKINGS_SCORING.items() if stat in columns]
+    if not scored:
+        return pl.lit(0.0)
+    return pl.sum_horizontal(scored).cast(pl.Float64).round(2)
+
+def fantasy_points_sql(columns: Iterable[str]) -> str:
+    """
+    Build a SQL expression computing DraftKings PPR fantasy points for each row of a table
+    
+    Args:
+        columns: Stat columns of the table; scoring stats not listed count as 0
+        
+    Returns:
+        str: Rounded fantasy points, the SQL equivalent of calculate_fantasy_points
+    """
+    columns = set(columns)
+    scored = [f"COALESCE({stat}, 0) * {weight}"
+              for stat, weight in DRAFTKINGS_SCORING.items() if stat in columns]
+    if not scored:
+        return "0.0"
+    return f"ROUND({' + '.join(scored)}, 2)"
+
 def add_fantasy_points_to_stats(stats_list: list) -> list:
     """
     Add fantasy points calculation to a list of player stats
@@ -46,9 +86,16 @@ def add_fantasy_points_to_stats(stats_list: list) -> list:
     Returns:
         list: Updated stats list with fantasy_points field
     """
-    for stats in stats_list:
-        if 'fantasy_points' not in stats or stats['fantasy_points'] is None:
-            stats['fantasy_points'] = calculate_fantasy_points(stats)
+    pending = [stats for stats in stats_list if stats.get('fantasy_points') is None]
+    if not pending:
+        return stats_list
+    
+    # Score every pending row in one matrix-vector product
+    values = np.array([[stats.get(stat) or 0 for stat in SCORED_STATS] for stats in pending],
+                      dtype=np.float64)
+    points = np.round(values @ SCORING_WEIGHTS, 2)
+    for stats, total in zip(pending, points.tolist()):
+        stats['fantasy_points'] = total
     
     return stats_list
 
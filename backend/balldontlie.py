@@ -10,9 +10,17 @@ Rate Limits (ALL-STAR tier): 60 requests/minute
 
 import os
 import time
+import hashlib
 import logging
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+import orjson
 import requests
-from typing import List, Dict, Generator
+from typing import List, Dict, Generator, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -26,7 +34,17 @@ BDL_API_KEY = os.getenv("BALLDONTLIE_API_KEY", "")
 # Rate limiting configuration (ALL-STAR tier: 60 req/min)
 RATE_LIMIT_REQUESTS = 60
 RATE_LIMIT_WINDOW = 60  # seconds
-REQUEST_DELAY = 1.1  # seconds between requests to stay under limit
+PAGINATE_WORKERS = 6  # filter variants paginated at once; the rate limiter still caps sends
+
+# Responses for completed seasons never change, so they are kept on disk across runs
+# (under the backend's git-ignored cache directory by default)
+BDL_CACHE_DIR = Path(os.getenv("BALLDONTLIE_CACHE_DIR", Path(__file__).parent / "cache" / "bdl"))
+
+
+def current_season(today: date = None) -> int:
+    """NFL season in progress; a season runs into February of the following year."""
+    today = today or date.today()
+    return today.year if today.month >= 3 else today.year - 1
 
 
 class RateLimiter:
@@ -35,22 +53,27 @@ class RateLimiter:
     def __init__(self, max_requests: int = RATE_LIMIT_REQUESTS, window: int = RATE_LIMIT_WINDOW):
         self.max_requests = max_requests
         self.window = window
-        self.requests = []
+        # Request times in order; monotonic so wall-clock jumps can't skew the window
+        self.requests = deque()
+        # Shared by paginating threads; held while sleeping so waiters queue up in turn
+        self._lock = threading.Lock()
 
     def wait_if_needed(self):
         """Wait if we're approaching the rate limit."""
-        now = time.time()
-        # Remove requests outside the window
-        self.requests = [r for r in self.requests if now - r < self.window]
+        with self._lock:
+            now = time.monotonic()
+            # Drop requests that have left the window, oldest first
+            while self.requests and now - self.requests[0] >= self.window:
+                self.requests.popleft()
 
-        if len(self.requests) >= self.max_requests:
-            # Wait until the oldest request falls outside the window
-            sleep_time = self.window - (now - self.requests[0]) + 0.1
-            if sleep_time > 0:
-                logger.info(f"Rate limit approaching, sleeping for {sleep_time:.1f}s")
-                time.sleep(sleep_time)
+            if len(self.requests) >= self.max_requests:
+                # Wait until the oldest request falls outside the window
+                sleep_time = self.window - (now - self.requests[0]) + 0.1
+                if sleep_time > 0:
+                    logger.info(f"Rate limit approaching, sleeping for {sleep_time:.1f}s")
+                    time.sleep(sleep_time)
 
-        self.requests.append(time.time())
+            self.requests.append(time.monotonic())
 
 
 class BallDontLieClient:
@@ -69,8 +92,46 @@ class BallDontLieClient:
             "Content-Type": "application/json"
         })
 
+    def _cache_path(self, endpoint: str, params: Dict = None) -> Optional[Path]:
+        """Disk cache file for a request, or None if its data can still change.
+
+        Only requests filtered to completed seasons are cached.
+        """
+        params = params or {}
+        seasons = params.get("seasons[]") or ([params["season"]] if "season" in params else [])
+        if not seasons or max(seasons) >= current_season():
+            return None
+
+        key = orjson.dumps([endpoint, params], option=orjson.OPT_SORT_KEYS)
+        return BDL_CACHE_DIR / f"{hashlib.sha1(key).hexdigest()}.json"
+
     def _make_request(self, endpoint: str, params: Dict = None, retries: int = 3) -> Dict:
-        """Make a request to the API with rate limiting and retry logic."""
+        """Make a request to the API with rate limiting and retry logic.
+
+        Responses for completed seasons are served from the disk cache when present.
+        """
+        cache_path = self._cache_path(endpoint, params)
+        if cache_path is not None and cache_path.exists():
+            return orjson.loads(cache_path.read_bytes())
+
+        data = self._fetch(endpoint, params, retries)
+        if cache_path is not None and data:
+            self._write_cache(cache_path, data)
+        return data
+
+    @staticmethod
+    def _write_cache(cache_path: Path, data: Dict):
+        """Write a response to the disk cache atomically; failures only cost a refetch."""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=cache_path.parent, delete=False) as tmp:
+                tmp.write(orjson.dumps(data))
+            os.replace(tmp.name, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not cache response at {cache_path}: {e}")
+
+    def _fetch(self, endpoint: str, params: Dict = None, retries: int = 3) -> Dict:
+        """Fetch from the API with rate limiting and retry logic."""
         url = f"{self.base_url}/{endpoint}"
 
         for attempt in range(retries):
@@ -87,9 +148,10 @@ class BallDontLieClient:
                     continue
 
                 response.raise_for_status()
-                return response.json()
+                # Decode the raw bytes; much faster than the stdlib json behind response.json()
+                return orjson.loads(response.content)
 
-            except requests.exceptions.RequestException as e:
+            except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
                 logger.error(f"Request failed (attempt {attempt + 1}/{retries}): {e}")
                 if attempt < retries - 1:
                     time.sleep(2 ** attempt)  # Exponential backoff
@@ -99,7 +161,10 @@ class BallDontLieClient:
         return {}
 
     def _paginate(self, endpoint: str, params: Dict = None, per_page: int = 100) -> Generator[Dict, None, None]:
-        """Paginate through all results using cursor-based pagination."""
+        """Paginate through all results using cursor-based pagination.
+
+        Pages are requested back to back; the rate limiter paces them.
+        """
         params = params or {}
         params["per_page"] = per_page
         cursor = None
@@ -121,8 +186,33 @@ class BallDontLieClient:
             if not cursor or not data:
                 break
 
-            # Small delay between pages
-            time.sleep(REQUEST_DELAY)
+    def map_paginate(self, endpoint: str, param_variants: List[Dict],
+                     per_page: int = 100) -> Generator[Dict, None, None]:
+        """Paginate several filter variants of an endpoint concurrently.
+
+        Each variant (e.g. one per season) is paged through on its own worker
+        thread while the shared rate limiter keeps the total request rate in
+        budget. Items are yielded variant by variant, in the order given.
+        """
+        if len(param_variants) <= 1:
+            for params in param_variants:
+                yield from self._paginate(endpoint, params, per_page)
+            return
+
+        def fetch_all(params: Dict) -> List[Dict]:
+            return list(self._paginate(endpoint, params, per_page))
+
+        with ThreadPoolExecutor(max_workers=min(PAGINATE_WORKERS, len(param_variants))) as executor:
+            futures = [executor.submit(fetch_all, params) for params in param_variants]
+            for future in futures:
+                yield from future.result()
+
+    @staticmethod
+    def _season_variants(params: Dict, seasons: List[int] = None) -> List[Dict]:
+        """Split a query into one params dict per season so they can be paged in parallel."""
+        if not seasons:
+            return [params]
+        return [{**params, "seasons[]": [season]} for season in seasons]
 
     # ==================== Teams ====================
 
@@ -185,11 +275,8 @@ class BallDontLieClient:
     def get_games(self, seasons: List[int] = None, weeks: List[int] = None,
                   team_ids: List[int] = None, dates: List[str] = None,
                   postseason: bool = None, per_page: int = 100) -> Generator[Dict, None, None]:
-        """Get games with optional filters."""
+        """Get games with optional filters. Several seasons are fetched concurrently."""
         params = {}
-        if seasons:
-            for season in seasons:
-                params.setdefault("seasons[]", []).append(season)
         if weeks:
             for week in weeks:
                 params.setdefault("weeks[]", []).append(week)
@@ -202,7 +289,7 @@ class BallDontLieClient:
         if postseason is not None:
             params["postseason"] = str(postseason).lower()
 
-        yield from self._paginate("games", params, per_page)
+        yield from self.map_paginate("games", self._season_variants(params, seasons), per_page)
 
     def get_game(self, game_id: int) -> Dict:
         """Get a specific game by ID."""
@@ -213,11 +300,8 @@ class BallDontLieClient:
 
     def get_stats(self, seasons: List[int] = None, player_ids: List[int] = None,
                   game_ids: List[int] = None, per_page: int = 100) -> Generator[Dict, None, None]:
-        """Get player game stats with optional filters."""
+        """Get player game stats with optional filters. Several seasons are fetched concurrently."""
         params = {}
-        if seasons:
-            for season in seasons:
-                params.setdefault("seasons[]", []).append(season)
         if player_ids:
             for player_id in player_ids:
                 params.setdefault("player_ids[]", []).append(player_id)
@@ -225,7 +309,7 @@ class BallDontLieClient:
             for game_id in game_ids:
                 params.setdefault("game_ids[]", []).append(game_id)
 
-        yield from self._paginate("stats", params, per_page)
+        yield from self.map_paginate("stats", self._season_variants(params, seasons), per_page)
 
     def get_stats_for_season(self, season: int) -> List[Dict]:
         """Get all stats for a specific season."""
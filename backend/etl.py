@@ -26,7 +26,7 @@ ROOT_DIR = Path(__file__).parent
 DB_PATH = ROOT_DIR / "fantasy_football.db"
 
 # Skill positions for fantasy football
-SKILL_POSITIONS = ['QB', 'RB', 'WR', 'TE']
+SKILL_POSITIONS = frozenset({'QB', 'RB', 'WR', 'TE'})
 
 # DraftKings PPR Scoring System
 DRAFTKINGS_SCORING = {
@@ -228,6 +228,7 @@ def load_bdl_teams(conn: duckdb.DuckDBPyConnection, client: BallDontLieClient =
 
     teams = client.get_teams()
     loaded = 0
+    loaded_at = datetime.now(timezone.utc)
 
     for team in teams:
         try:
@@ -242,7 +243,7 @@ def load_bdl_teams(conn: duckdb.DuckDBPyConnection, client: BallDontLieClient =
                 team.get('location'),
                 team.get('conference'),
                 team.get('division'),
-                datetime.now(timezone.utc)
+                loaded_at
             ])
             loaded += 1
         except Exception as e:
@@ -258,38 +259,39 @@ def load_bdl_games(conn: duckdb.DuckDBPyConnection, seasons: List[int],
     client = client or get_client()
 
     loaded = 0
-    for season in seasons:
-        logger.info(f"Loading games for season {season}...")
-
-        for game in client.get_games(seasons=[season]):
-            try:
-                home_team = game.get('home_team', {})
-                visitor_team = game.get('visitor_team', {})
-
-                conn.execute("""
-                    INSERT OR REPLACE INTO bdl_games
-                    (bdl_game_id, season, week, date, status, home_team_id, home_team_abbr,
-                     visitor_team_id, visitor_team_abbr, home_score, visitor_score, venue, postseason, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, [
-                    game.get('id'),
-                    game.get('season'),
-                    game.get('week'),
-                    game.get('date'),
-                    game.get('status'),
-                    home_team.get('id'),
-                    home_team.get('abbreviation'),
-                    visitor_team.get('id'),
-                    visitor_team.get('abbreviation'),
-                    game.get('home_team_score'),
-                    game.get('visitor_team_score'),
-                    game.get('venue'),
-                    game.get('postseason', False),
-                    datetime.now(timezone.utc)
-                ])
-                loaded += 1
-            except Exception as e:
-                logger.error(f"Error loading game {game.get('id')}: {e}")
+    loaded_at = datetime.now(timezone.utc)
+    logger.info(f"Loading games for seasons {seasons}...")
+
+    # The client pages through the seasons concurrently
+    for game in client.get_games(seasons=seasons):
+        try:
+            home_team = game.get('home_team', {})
+            visitor_team = game.get('visitor_team', {})
+
+            conn.execute("""
+                INSERT OR REPLACE INTO bdl_games
+                (bdl_game_id, season, week, date, status, home_team_id, home_team_abbr,
+                 visitor_team_id, visitor_team_abbr, home_score, visitor_score, venue, postseason, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                game.get('id'),
+                game.get('season'),
+                game.get('week'),
+                game.get('date'),
+                game.get('status'),
+                home_team.get('id'),
+                home_team.get('abbreviation'),
+                visitor_team.get('id'),
+                visitor_team.get('abbreviation'),
+                game.get('home_team_score'),
+                game.get('visitor_team_score'),
+                game.get('venue'),
+                game.get('postseason', False),
+                loaded_at
+            ])
+            loaded += 1
+        except Exception as e:
+            logger.error(f"Error loading game {game.get('id')}: {e}")
 
     logger.info(f"Loaded {loaded} games from Ball Don't Lie")
     return loaded
@@ -301,75 +303,76 @@ def load_bdl_stats(conn: duckdb.DuckDBPyConnection, seasons: List[int],
     client = client or get_client()
 
     loaded = 0
-    for season in seasons:
-        logger.info(f"Loading stats for season {season}...")
-
-        for stat in client.get_stats(seasons=[season]):
-            try:
-                player = stat.get('player', {})
-                game = stat.get('game', {})
-                team = stat.get('team', {})
-
-                # Also upsert player data
-                conn.execute("""
-                    INSERT OR REPLACE INTO bdl_players
-                    (bdl_player_id, first_name, last_name, full_name, position, position_abbr,
-                     height, weight, jersey_number, college, experience, age, team_id, team_abbr, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, [
-                    player.get('id'),
-                    player.get('first_name'),
-                    player.get('last_name'),
-                    f"{player.get('first_name', '')} {player.get('last_name', '')}".strip(),
-                    player.get('position'),
-                    player.get('position_abbreviation'),
-                    player.get('height'),
-                    player.get('weight'),
-                    player.get('jersey_number'),
-                    player.get('college'),
-                    player.get('experience'),
-                    player.get('age'),
-                    team.get('id'),
-                    team.get('abbreviation'),
-                    datetime.now(timezone.utc)
-                ])
-
-                # Insert stats
-                conn.execute("""
-                    INSERT OR REPLACE INTO bdl_player_game_stats
-                    (bdl_player_id, bdl_game_id, season, week, team_abbr,
-                     passing_completions, passing_attempts, passing_yards, passing_touchdowns, passing_interceptions, qbr,
-                     rushing_attempts, rushing_yards, rushing_touchdowns,
-                     receptions, receiving_yards, receiving_touchdowns, receiving_targets,
-                     fumbles, fumbles_lost, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, [
-                    player.get('id'),
-                    game.get('id'),
-                    game.get('season'),
-                    game.get('week'),
-                    team.get('abbreviation'),
-                    stat.get('passing_completions'),
-                    stat.get('passing_attempts'),
-                    stat.get('passing_yards'),
-                    stat.get('passing_touchdowns'),
-                    stat.get('passing_interceptions'),
-                    stat.get('qbr'),
-                    stat.get('rushing_attempts'),
-                    stat.get('rushing_yards'),
-                    stat.get('rushing_touchdowns'),
-                    stat.get('receptions'),
-                    stat.get('receiving_yards'),
-                    stat.get('receiving_touchdowns'),
-                    stat.get('receiving_targets'),
-                    stat.get('fumbles'),
-                    stat.get('fumbles_lost'),
-                    datetime.now(timezone.utc)
-                ])
-                loaded += 1
-
-            except Exception as e:
-                logger.error(f"Error loading stat: {e}")
+    loaded_at = datetime.now(timezone.utc)
+    logger.info(f"Loading stats for seasons {seasons}...")
+
+    # The client pages through the seasons concurrently
+    for stat in client.get_stats(seasons=seasons):
+        try:
+            player = stat.get('player', {})
+            game = stat.get('game', {})
+            team = stat.get('team', {})
+
+            # Also upsert player data
+            conn.execute("""
+                INSERT OR REPLACE INTO bdl_players
+                (bdl_player_id, first_name, last_name, full_name, position, position_abbr,
+                 height, weight, jersey_number, college, experience, age, team_id, team_abbr, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                player.get('id'),
+                player.get('first_name'),
+                player.get('last_name'),
+                f"{player.get('first_name', '')} {player.get('last_name', '')}".strip(),
+                player.get('position'),
+                player.get('position_abbreviation'),
+                player.get('height'),
+                player.get('weight'),
+                player.get('jersey_number'),
+                player.get('college'),
+                player.get('experience'),
+                player.get('age'),
+                team.get('id'),
+                team.get('abbreviation'),
+                loaded_at
+            ])
+
+            # Insert stats
+            conn.execute("""
+                INSERT OR REPLACE INTO bdl_player_game_stats
+                (bdl_player_id, bdl_game_id, season, week, team_abbr,
+                 passing_completions, passing_attempts, passing_yards, passing_touchdowns, passing_interceptions, qbr,
+                 rushing_attempts, rushing_yards, rushing_touchdowns,
+                 receptions, receiving_yards, receiving_touchdowns, receiving_targets,
+                 fumbles, fumbles_lost, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                player.get('id'),
+                game.get('id'),
+                game.get('season'),
+                game.get('week'),
+                team.get('abbreviation'),
+                stat.get('passing_completions'),
+                stat.get('passing_attempts'),
+                stat.get('passing_yards'),
+                stat.get('passing_touchdowns'),
+                stat.get('passing_interceptions'),
+                stat.get('qbr'),
+                stat.get('rushing_attempts'),
+                stat.get('rushing_yards'),
+                stat.get('rushing_touchdowns'),
+                stat.get('receptions'),
+                stat.get('receiving_yards'),
+                stat.get('receiving_touchdowns'),
+                stat.get('receiving_targets'),
+                stat.get('fumbles'),
+                stat.get('fumbles_lost'),
+                loaded_at
+            ])
+            loaded += 1
+
+        except Exception as e:
+            logger.error(f"Error loading stat: {e}")
 
     logger.info(f"Loaded {loaded} player game stats from Ball Don't Lie")
     return loaded
@@ -383,6 +386,7 @@ def load_bdl_injuries(conn: duckdb.DuckDBPyConnection, client: BallDontLieClient
     conn.execute("DELETE FROM current_injuries")
 
     loaded = 0
+    loaded_at = datetime.now(timezone.utc)
     for injury in client.get_player_injuries():
         try:
             player = injury.get('player', {})
@@ -400,7 +404,7 @@ def load_bdl_injuries(conn: duckdb.DuckDBPyConnection, client: BallDontLieClient
                 injury.get('status'),
                 injury.get('comment'),
                 injury.get('date'),
-                datetime.now(timezone.utc)
+                loaded_at
             ])
             loaded += 1
         except Exception as e:
@@ -418,6 +422,7 @@ def load_bdl_rosters(conn: duckdb.DuckDBPyConnection, client: BallDontLieClient
     conn.execute("DELETE FROM team_rosters")
 
     loaded = 0
+    loaded_at = datetime.now(timezone.utc)
     for player in client.get_active_players():
         try:
             team = player.get('team', {})
@@ -440,7 +445,7 @@ def load_bdl_rosters(conn: duckdb.DuckDBPyConnection, client: BallDontLieClient
                 player.get('college'),
                 player.get('experience'),
                 player.get('age'),
-                datetime.now(timezone.utc)
+                loaded_at
             ])
             loaded += 1
         except Exception as e:
@@ -455,6 +460,7 @@ def load_bdl_rosters(conn: duckdb.DuckDBPyConnection, client: BallDontLieClient
 def load_depth_charts(conn: duckdb.DuckDBPyConnection, seasons: List[int]) -> int:
     """Load depth charts from nflreadpy for specified seasons."""
     loaded = 0
+    loaded_at = datetime.now(timezone.utc)
 
     for season in seasons:
         logger.info(f"Loading depth charts for season {season}...")
@@ -475,7 +481,8 @@ def load_depth_charts(conn: duckdb.DuckDBPyConnection, seasons: List[int]) -> in
             # Delete existing data for this season
             conn.execute("DELETE FROM depth_charts WHERE season = ?", [season])
 
-            for _, row in dc_pd.iterrows():
+            # Plain dicts keep row.get() fallbacks without building a Series per row
+            for row in dc_pd.to_dict(orient='records'):
                 try:
                     dc_id = f"{row.get('season', '')}_{row.get('week', '')}_{row.get('club_code', '')}_{row.get('depth_position', '')}_{row.get('depth_team', '')}"
 
@@ -499,7 +506,7 @@ def load_depth_charts(conn: duckdb.DuckDBPyConnection, seasons: List[int]) -> in
                         row.get('jersey_number'),
                         row.get('formation'),
                         row.get('game_type'),
-                        datetime.now(timezone.utc)
+                        loaded_at
                     ])
                     loaded += 1
                 except Exception as e:
@@ -517,6 +524,7 @@ def load_depth_charts(conn: duckdb.DuckDBPyConnection, seasons: List[int]) -> in
 def load_snap_counts(conn: duckdb.DuckDBPyConnection, seasons: List[int]) -> int:
     """Load snap counts from nflreadpy for specified seasons."""
     loaded = 0
+    loaded_at = datetime.now(timezone.utc)
 
     for season in seasons:
         logger.info(f"Loading snap counts for season {season}...")
@@ -534,7 +542,8 @@ def load_snap_counts(conn: duckdb.DuckDBPyConnection, seasons: List[int]) -> int
             if 'game_type' in snap_pd.columns:
                 snap_pd = snap_pd[snap_pd['game_type'] == 'REG']
 
-            snap_pd = snap_pd[snap_pd['position'].isin(SKILL_POSITIONS)]
+            # As a category, isin tests the few distinct positions once and then matches codes
+            snap_pd = snap_pd[snap_pd['position'].astype('category').isin(SKILL_POSITIONS)]
 
             if 'offense_snaps' in snap_pd.columns:
                 snap_pd = snap_pd[snap_pd['offense_snaps'] > 0]
@@ -542,7 +551,8 @@ def load_snap_counts(conn: duckdb.DuckDBPyConnection, seasons: List[int]) -> int
             # Delete existing data for this season
             conn.execute("DELETE FROM snap_counts WHERE season = ?", [season])
 
-            for _, row in snap_pd.iterrows():
+            # Plain dicts keep row.get() fallbacks without building a Series per row
+            for row in snap_pd.to_dict(orient='records'):
                 try:
                     snap_id = f"{row.get('season', '')}_{row.get('week', '')}_{row.get('team', '')}_{str(row.get('player', '')).replace(' ', '_')}"
 
@@ -568,7 +578,7 @@ def load_snap_counts(conn: duckdb.DuckDBPyConnection, seasons: List[int]) -> int
                         row.get('position'),
                         row.get('pfr_game_id', row.get('game_id', '')),
                         row.get('opponent', ''),
-                        datetime.now(timezone.utc)
+                        loaded_at
                     ])
                     loaded += 1
                 except Exception as e:
@@ -22,7 +22,7 @@ TEAM_ABBREV_MAP = {
 }
 
 # Fantasy-relevant skill positions
-SKILL_POSITIONS = ['QB', 'RB', 'WR', 'TE', 'K']
+SKILL_POSITIONS = frozenset({'QB', 'RB', 'WR', 'TE', 'K'})
 
 def normalize_team_abbrev(abbrev: str) -> str:
     """Normalize team abbreviation to standard format"""
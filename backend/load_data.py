@@ -11,7 +11,7 @@ from datetime import datetime, timezone
 sys.path.append('.')
 
 from app.utils.database import get_db
-from app.utils.fantasy_points import calculate_fantasy_points
+from app.utils.fantasy_points import fantasy_points_sql
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -53,9 +53,12 @@ def create_sample_data():
     
     weekly_data = []
     season_data = []
+    created_at = datetime.now(timezone.utc)
     
     for season in [2023, 2024]:
         for player in sample_players:
+            safe_name = player['name'].replace(' ', '_')
+            
             # Generate season totals
             if player["position"] == "QB":
                 season_stats = {
@@ -114,11 +117,11 @@ def create_sample_data():
                     "games_played": 16
                 }
             
-            # Calculate fantasy points
-            season_stats["fantasy_points"] = calculate_fantasy_points(season_stats)
+            # Scored in the database once loaded
+            season_stats["fantasy_points"] = None
             
             # Create season record
-            player_id = f"{season}_{player['name'].replace(' ', '_')}"
+            player_id = f"{season}_{safe_name}"
             season_record = {
                 "id": f"season_{player_id}_{player['team']}",
                 "player_id": player_id,
@@ -127,7 +130,7 @@ def create_sample_data():
                 "team": player["team"],
                 "season": season,
                 **season_stats,
-                "created_at": datetime.now(timezone.utc)
+                "created_at": created_at
             }
             season_data.append(season_record)
             
@@ -147,9 +150,9 @@ def create_sample_data():
                     "fumbles_lost": max(0, int(season_stats["fumbles_lost"] / 17)) if week % 5 == 0 else 0,
                 }
                 
-                weekly_stats["fantasy_points"] = calculate_fantasy_points(weekly_stats)
+                weekly_stats["fantasy_points"] = None
                 
-                weekly_player_id = f"{season}_{week}_{player['name'].replace(' ', '_')}"
+                weekly_player_id = f"{season}_{week}_{safe_name}"
                 weekly_record = {
                     "id": f"{weekly_player_id}_{player['team']}",
                     "player_id": weekly_player_id,
@@ -163,7 +166,7 @@ def create_sample_data():
                     "snap_percentage": None,
                     "snap_count": None,
                     "dk_salary": None,
-                    "created_at": datetime.now(timezone.utc)
+                    "created_at": created_at
                 }
                 weekly_data.append(weekly_record)
     
@@ -190,6 +193,14 @@ async def load_sample_data():
         logger.info(f"Loading {len(season_data)} season records...")
         season_loaded = db.execute_batch_insert("season_stats", season_data, batch_size=100)
         
+        # Score every loaded row in one columnar UPDATE rather than row by row in Python
+        for table, records in (("weekly_stats", weekly_data), ("season_stats", season_data)):
+            if records:
+                db.connection.execute(
+                    f"UPDATE {table} SET fantasy_points = {fantasy_points_sql(records[0])} "
+                    "WHERE fantasy_points IS NULL"
+                )
+        
         logger.info(f"Data loading completed!")
         logger.info(f"  Weekly records: {weekly_loaded}")
         logger.info(f"  Season records: {season_loaded}")
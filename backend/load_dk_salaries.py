@@ -36,11 +36,13 @@ for sheet_name in xl.sheet_names:
         print(f"Unique weeks in data: {df['WEEK'].unique()}")
     
     # Parse and load data
+    loaded_at = datetime.now(timezone.utc)  # One load timestamp for every row
     inserted = 0
     updated = 0
     skipped = 0
     
-    for idx, row in df.iterrows():
+    # Plain dicts keep row.get() fallbacks without building a Series per row
+    for idx, row in enumerate(df.to_dict(orient='records')):
         try:
             # Extract data - adjust column names based on actual structure
             week = row.get('WEEK', 1)  # Default to week 1 if not specified
@@ -71,7 +73,7 @@ for sheet_name in xl.sheet_names:
                 continue
             
             # Only QB, RB, WR, TE
-            if position not in ['QB', 'RB', 'WR', 'TE']:
+            if position not in {'QB', 'RB', 'WR', 'TE'}:
                 skipped += 1
                 continue
             
@@ -89,7 +91,7 @@ for sheet_name in xl.sheet_names:
                     2025,
                     int(week),
                     salary,
-                    datetime.now(timezone.utc)
+                    loaded_at
                 ))
                 inserted += 1
             except Exception as e:
@@ -101,7 +103,7 @@ for sheet_name in xl.sheet_names:
                         WHERE player_name = ? AND team = ? AND season = ? AND week = ?
                     """, (
                         salary,
-                        datetime.now(timezone.utc),
+                        loaded_at,
                         name,
                         team,
                         2025,
@@ -10,6 +10,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from app.utils.database import DatabaseManager
 from app.services.data_preloader import initialize_preloader
+from app.services.optimized_player_service import get_optimized_player_service
 from app.routes.players import router as players_router
 from app.routes.data import router as data_router
 
@@ -42,6 +43,10 @@ async def lifespan(app: FastAPI):
         preloader = await initialize_preloader()
         logger.info("Data preloading completed - all data now in memory for instant access")
         
+        # Build the player service off the event loop so startup stays responsive
+        player_service = await asyncio.to_thread(get_optimized_player_service)
+        await asyncio.to_thread(player_service.warm_weekly_pages)
+        
         # Log preloader statistics
         stats = preloader.get_stats()
         logger.info(f"Preloader stats: {stats}")
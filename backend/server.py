@@ -14,7 +14,7 @@ from fastapi.middleware.cors import CORSMiddleware
 import logging
 from pathlib import Path
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, get_args
 from datetime import datetime, date
 import asyncio
 from functools import lru_cache
@@ -22,7 +22,7 @@ import traceback
 
 # Import our database manager
 from app.utils.database import get_db
-from app.config.settings import DRAFTKINGS_SCORING, SKILL_POSITIONS, NFL_TEAMS
+from app.config.settings import DRAFTKINGS_SCORING, PositionLiteral, NFL_TEAMS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -514,7 +514,7 @@ async def get_teams():
 @app.get("/api/positions")
 async def get_positions():
     """Get list of fantasy positions"""
-    return SKILL_POSITIONS
+    return list(get_args(PositionLiteral))
 
 @app.get("/api/seasons")
 async def get_available_seasons():
@@ -522,7 +522,7 @@ async def get_available_seasons():
     try:
         db = get_db()
         query = "SELECT DISTINCT season FROM weekly_stats ORDER BY season DESC"
-        seasons = db.execute_query(query)
+        seasons = db.execute_query(query, cache=True)
         return [row["season"] for row in seasons]
     except Exception as e:
         logger.error(f"Error getting seasons: {e}")
@@ -534,7 +534,7 @@ async def get_available_weeks(season: int):
     try:
         db = get_db()
         query = "SELECT DISTINCT week FROM weekly_stats WHERE season = ? ORDER BY week"
-        weeks = db.execute_query(query, [season])
+        weeks = db.execute_query(query, [season], cache=True)
         return [row["week"] for row in weeks]
     except Exception as e:
         logger.error(f"Error getting weeks: {e}")